@@ -1,9 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from goals.models import Goal
+from goals import cache as goal_cache
+from goals.models import Goal, GoalMembership
 
 User = get_user_model()
 
+# Membership state of an instance that wasn't loaded with status and partner
+UNKNOWN = object()
+
 class GoalSharing(models.Model):
     SHARING_STATUS = [
         ('pending', 'Pending'),
@@ -39,11 +45,49 @@ class GoalSharing(models.Model):
 
     class Meta:
         unique_together = ['goal', 'shared_to_user']
+        indexes = [
+            models.Index(fields=['shared_by_user', '-created_at', '-id'], name='sharing_by_created_idx'),
+            models.Index(fields=['shared_to_user', '-created_at', '-id'], name='sharing_to_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names and 'shared_to_user_id' in field_names:
+            instance._loaded_member_id = instance.get_member_id()
+        return instance
+
+    def get_member_id(self):
+        """Partner who can see the goal through this share, if any"""
+        return self.shared_to_user_id if self.status == 'accepted' else None
 
     def save(self, *args, **kwargs):
         if not self.invitation_code:
             self.invitation_code = self.generate_invitation_code()
-        super().save(*args, **kwargs)
+        previous_member_id = None if self._state.adding else getattr(self, '_loaded_member_id', UNKNOWN)
+        member_id = self.get_member_id()
+
+        # Only acceptance, or leaving it, touches the partner's membership
+        if previous_member_id == member_id:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if previous_member_id is UNKNOWN:
+                    GoalMembership.rebuild([self.goal_id])
+                else:
+                    if previous_member_id is not None:
+                        GoalMembership.remove(self.goal_id, previous_member_id)
+                    if member_id is not None:
+                        GoalMembership.add(self.goal_id, member_id)
+        self._loaded_member_id = member_id
+        self.clear_goal_sharing_cache()
+
+    def clear_goal_sharing_cache(self):
+        """Drop the goal's memoized sharing lookups and cached payload when this record changes"""
+        if GoalSharing.goal.is_cached(self):
+            self.goal.clear_sharing_cache()
+        goal_cache.invalidate_goal(self.goal_id)
 
     def generate_invitation_code(self):
         import random
@@ -54,4 +98,20 @@ class GoalSharing(models.Model):
                 return code
 
     def __str__(self):
-        return f"Goal {self.goal.title} shared by {self.shared_by_user.username}"
\ No newline at end of file
+        return f"Goal {self.goal.title} shared by {self.shared_by_user.username}"
+
+
+@receiver(post_delete, sender=GoalSharing)
+def drop_shared_membership(sender, instance, **kwargs):
+    """Revoke the partner's access when a share goes away
+
+    A signal rather than GoalSharing.delete(), because queryset deletes (the
+    admin's bulk action) and cascades never call the model method. It runs
+    inside the deletion's transaction.
+    """
+    member_id = getattr(instance, '_loaded_member_id', UNKNOWN)
+    if member_id is UNKNOWN:
+        GoalMembership.rebuild([instance.goal_id])
+    elif member_id is not None:
+        GoalMembership.remove(instance.goal_id, member_id)
+    instance.clear_goal_sharing_cache()
@@ -1,3 +1,89 @@
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from goals.models import Goal, GoalMembership
+from users.models import User
+from .models import GoalSharing
+
+
+class GoalSharingConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.partner = User.objects.create_user('partner@example.com', 'partner', 'password')
+        self.goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='month', start_date=timezone.now().date()
+        )
+        self.sharing = GoalSharing.objects.create(
+            goal=self.goal, shared_by_user=self.owner, shared_to_user=self.partner, status='accepted'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def assert_changed_after(self, url, change):
+        etag = self.client.get(url).headers['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_username_changes_invalidate_validators(self):
+        def rename_partner():
+            self.partner.username = 'renamed'
+            self.partner.save()
+
+        response = self.assert_changed_after('/api/goal-sharing/', rename_partner)
+        self.assertEqual(response.data['results'][0]['shared_to_username'], 'renamed')
+
+        def rename_owner():
+            self.owner.username = 'owner2'
+            self.owner.save()
+
+        response = self.assert_changed_after(f'/api/goal-sharing/{self.sharing.id}/', rename_owner)
+        self.assertEqual(response.data['shared_by_username'], 'owner2')
+
+    def test_deleting_an_older_share_invalidates_validators(self):
+        other = User.objects.create_user('other@example.com', 'other', 'password')
+        newer = GoalSharing.objects.create(
+            goal=self.goal, shared_by_user=self.owner, shared_to_user=other, status='accepted'
+        )
+
+        # The deleted share isn't the newest row, so no Max(updated_at) moves
+        def delete_older_share():
+            GoalSharing.objects.get(pk=self.sharing.pk).delete()
+
+        self.assert_changed_after(f'/api/goals/{self.goal.id}/', delete_older_share)
+        self.sharing = GoalSharing.objects.create(
+            goal=self.goal, shared_by_user=self.owner, shared_to_user=self.partner, status='accepted'
+        )
+        newer.save()
+        self.assert_changed_after(f'/api/goal-sharing/{newer.id}/', delete_older_share)
+
+
+class GoalSharingAdminTests(TestCase):
+    def test_bulk_delete_revokes_partner_access(self):
+        admin_user = User.objects.create_superuser('admin@example.com', 'admin', 'password')
+        owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        partner = User.objects.create_user('partner@example.com', 'partner', 'password')
+        goal = Goal.objects.create(
+            user=owner, title='Goal', duration='month', start_date=timezone.now().date()
+        )
+        sharing = GoalSharing.objects.create(
+            goal=goal, shared_by_user=owner, shared_to_user=partner, status='accepted'
+        )
+        partner_client = APIClient()
+        partner_client.force_authenticate(partner)
+        self.assertEqual(partner_client.get(f'/api/goals/{goal.id}/').status_code, 200)
+
+        self.client.force_login(admin_user)
+        response = self.client.post('/admin/goal_sharing/goalsharing/', {
+            'action': 'delete_selected',
+            '_selected_action': [sharing.id],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(GoalSharing.objects.exists())
+
+        self.assertFalse(GoalMembership.objects.filter(user=partner).exists())
+        self.assertEqual(partner_client.get(f'/api/goals/{goal.id}/').status_code, 404)
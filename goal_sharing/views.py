@@ -2,13 +2,15 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import models
+from django.db.models import Count, Max, Q
 from .models import GoalSharing
 from .serializers import GoalSharingSerializer
 from goals.models import Goal
+from harumada.conditional import ConditionalGetMixin
 import uuid
 
-class GoalSharingViewSet(viewsets.ModelViewSet):
+class GoalSharingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GoalSharingSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post', 'delete']
@@ -17,14 +19,47 @@ class GoalSharingViewSet(viewsets.ModelViewSet):
         return GoalSharing.objects.filter(
             Q(shared_by_user=self.request.user) | 
             Q(shared_to_user=self.request.user)
+        ).select_related('shared_by_user', 'shared_to_user').prefetch_related(
+            # Nested goals are serialized, and cached, exactly like GoalViewSet's
+            models.Prefetch(
+                'goal',
+                queryset=Goal.objects.with_sharing().with_today_attendance().with_live_progress()
+            )
         )
 
+    def get_conditional_aggregates(self):
+        """Everything a sharing payload, including its nested goal, is built from bumps one of these"""
+        return {
+            'count': Count('id', distinct=True),
+            'sharing_updated': Max('updated_at'),
+            'shared_by_updated': Max('shared_by_user__updated_at'),
+            'shared_to_updated': Max('shared_to_user__updated_at'),
+            'goal_updated': Max('goal__updated_at'),
+            # Counts catch deletes, which no Max() sees
+            'goal_share_count': Count('goal__shares', distinct=True),
+            'goal_share_updated': Max('goal__shares__updated_at'),
+            'goal_owner_updated': Max('goal__user__updated_at'),
+            'goal_partner_updated': Max('goal__shares__shared_to_user__updated_at'),
+        }
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self.conditional_response(request)
+        if not_modified:
+            return not_modified
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified = self.conditional_response(request)
+        if not_modified:
+            return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         goal_id = request.data.get('goal')
         
         # Validate goal ownership
         try:
-            goal = Goal.objects.get(id=goal_id, user=request.user)
+            goal = Goal.objects.with_live_progress().get(id=goal_id, user=request.user)
         except Goal.DoesNotExist:
             return Response({
                 'error': 'Goal not found or does not belong to you'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Goal, GoalAttendance
+from .models import Goal, GoalAttendance, GoalAttendanceStats, GoalMembership
 
 @admin.register(Goal)
 class GoalAdmin(admin.ModelAdmin):
@@ -30,6 +30,7 @@ class GoalAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = (
+        'end_date',
         'current_stage',
         'next_stage',
         'progress_percentage',
@@ -42,7 +43,7 @@ class GoalAdmin(admin.ModelAdmin):
             'fields': ('user', 'title', 'description', 'message')
         }),
         ('Duration Settings', {
-            'fields': ('duration', 'start_date')
+            'fields': ('duration', 'start_date', 'end_date')
         }),
         ('Progress Information', {
             'fields': (
@@ -63,4 +64,23 @@ class GoalAttendanceAdmin(admin.ModelAdmin):
     list_display = ('goal', 'user', 'date', 'created_at')
     list_filter = ('date', 'user')
     search_fields = ('goal__title', 'user__username')
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+@admin.register(GoalAttendanceStats)
+class GoalAttendanceStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'goal',
+        'total_days',
+        'perfect_days',
+        'current_streak',
+        'longest_streak',
+        'last_check_in_date'
+    )
+    search_fields = ('goal__title',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(GoalMembership)
+class GoalMembershipAdmin(admin.ModelAdmin):
+    list_display = ('goal', 'user')
+    search_fields = ('goal__title', 'user__username')
@@ -0,0 +1,90 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from harumada.async_api import async_api_view, json_response
+from .views import GoalViewSet
+
+NOT_FOUND = {'detail': 'No Goal matches the given query.'}
+
+
+def goal_viewset(request, action, **kwargs):
+    """A GoalViewSet set up the way DRF's dispatch would for `action`"""
+    view = GoalViewSet(request=request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+    view.headers = {}
+    return view
+
+
+def with_conditional_headers(view, response):
+    for header, value in getattr(view, 'conditional_headers', {}).items():
+        response.headers.setdefault(header, value)
+    return response
+
+
+@async_api_view(['GET', 'HEAD'], fallback=GoalViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def goal_list(request):
+    view = goal_viewset(request, 'list')
+    not_modified = await view.aconditional_response(request)
+    if not_modified:
+        return with_conditional_headers(view, not_modified)
+
+    def build_page():
+        # The cursor paginator evaluates the queryset itself
+        page = view.paginate_queryset(view.filter_queryset(view.get_queryset()))
+        return view.get_paginated_response(view.get_serializer(page, many=True).data).data
+
+    return with_conditional_headers(view, json_response(await sync_to_async(build_page)()))
+
+
+@async_api_view(
+    ['GET', 'HEAD'],
+    fallback=GoalViewSet.as_view({'get': 'retrieve', 'delete': 'destroy'})
+)
+async def goal_detail(request, pk):
+    view = goal_viewset(request, 'retrieve', pk=pk)
+    not_modified = await view.aconditional_response(request)
+    if not_modified:
+        return with_conditional_headers(view, not_modified)
+
+    goal = await view.get_queryset().filter(pk=pk).afirst()
+    if goal is None:
+        return json_response(NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+    data = await sync_to_async(lambda: view.get_serializer(goal).data)()
+    return with_conditional_headers(view, json_response(data))
+
+
+@async_api_view(['POST'])
+async def goal_mark_attendance(request, pk):
+    view = goal_viewset(request, 'mark_attendance', pk=pk)
+    goal = await view.get_queryset().filter(pk=pk).afirst()
+    if goal is None:
+        return json_response(NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+    original_goal = goal.get_original_goal()
+
+    # The check-in is one transaction, which has to stay on a single thread
+    try:
+        created, attendance_status = await sync_to_async(original_goal.mark_attendance)(request.user)
+    except PermissionError as e:
+        return json_response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+    return json_response({
+        'message': 'Attendance marked successfully' if created else 'Already marked attendance for today',
+        'attendance_status': attendance_status,
+        'created': created,
+        'original_goal_id': original_goal.id
+    })
+
+
+@async_api_view(['GET', 'HEAD'])
+async def goal_attendance_history(request, pk):
+    view = goal_viewset(request, 'attendance_history', pk=pk)
+    not_modified = await view.aconditional_response(request)
+    if not_modified:
+        return with_conditional_headers(view, not_modified)
+
+    goal = await view.get_queryset().filter(pk=pk).afirst()
+    if goal is None:
+        return json_response(NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+    try:
+        data = await sync_to_async(view.build_attendance_history)(goal.get_original_goal())
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return with_conditional_headers(view, json_response(data))
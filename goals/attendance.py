@@ -0,0 +1,53 @@
+"""Compact encodings of attendance days for the history endpoint.
+
+Days are non-negative integer offsets from an origin date, normally the
+goal's start_date (day 0). Bitmaps store day `n` in bit `n % 8` of byte
+`n // 8` and travel as base64.
+"""
+import base64
+
+
+def encode_runs(offsets):
+    """Collapse sorted day offsets into [[first_offset, length], ...] runs"""
+    runs = []
+    for offset in offsets:
+        if runs and runs[-1][0] + runs[-1][1] == offset:
+            runs[-1][1] += 1
+        elif not runs or runs[-1][0] + runs[-1][1] < offset:
+            runs.append([offset, 1])
+    return runs
+
+
+def bitmap_to_base64(bitmap):
+    return base64.b64encode(bitmap).decode('ascii')
+
+
+class AttendanceCalendar:
+    """One participant's attendance as an integer bitset of day offsets"""
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    def to_bytes(self):
+        return self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+
+    def add(self, offset):
+        """Mark a day as attended; returns False if it already was"""
+        if offset < 0:
+            raise ValueError('Day offsets must not be negative; pick an earlier origin')
+        if self.attended(offset):
+            return False
+        self.bits |= 1 << offset
+        return True
+
+    def attended(self, offset):
+        return offset >= 0 and bool(self.bits >> offset & 1)
+
+    def offsets(self):
+        bits = self.bits
+        offsets = []
+        while bits:
+            low = bits & -bits
+            offsets.append(low.bit_length() - 1)
+            bits ^= low
+        return offsets
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+# Bump when GoalSerializer's output shape changes
+SCHEMA_VERSION = 1
+
+EPOCH_KEY = 'goal-repr:epoch'
+
+# Disabled unless a shared backend is configured, see CACHES in settings
+CACHE_ALIAS = 'goals'
+
+# Per-process counters, see get_stats()
+stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def version_key(goal_id):
+    return f'goal-repr:{goal_id}:version'
+
+
+def representation_key(goal_id, epoch, version, today):
+    return f'goal-repr:v{SCHEMA_VERSION}:{epoch}:{goal_id}:{version}:{today.isoformat()}'
+
+
+def get_or_build(goals, build):
+    """Return serialized goals in order, building and caching the ones that miss"""
+    if not goals:
+        return []
+
+    cache = caches[CACHE_ALIAS]
+    today = timezone.now().date()
+    versions = cache.get_many([EPOCH_KEY] + [version_key(goal.pk) for goal in goals])
+    epoch = versions.get(EPOCH_KEY, 0)
+    keys = [
+        representation_key(goal.pk, epoch, versions.get(version_key(goal.pk), 0), today)
+        for goal in goals
+    ]
+    cached = cache.get_many(keys)
+
+    results = []
+    missing = {}
+    for goal, key in zip(goals, keys):
+        if key in cached:
+            results.append(cached[key])
+        else:
+            data = build(goal)
+            missing[key] = data
+            results.append(data)
+
+    stats['hits'] += len(goals) - len(missing)
+    stats['misses'] += len(missing)
+    if missing:
+        cache.set_many(missing, settings.GOAL_CACHE_TIMEOUT)
+    return results
+
+
+def invalidate_goal(goal_id):
+    """Drop cached representations of one goal"""
+    stats['invalidations'] += 1
+    caches[CACHE_ALIAS].set(version_key(goal_id), time.time_ns(), settings.GOAL_CACHE_TIMEOUT)
+
+
+def invalidate_goals(goal_ids):
+    """Drop cached representations of several goals at once"""
+    stats['invalidations'] += len(goal_ids)
+    version = time.time_ns()
+    caches[CACHE_ALIAS].set_many(
+        {version_key(goal_id): version for goal_id in goal_ids},
+        settings.GOAL_CACHE_TIMEOUT
+    )
+
+
+def invalidate_all_goals():
+    """Drop every cached goal representation, e.g. after bulk UPDATEs"""
+    stats['invalidations'] += 1
+    caches[CACHE_ALIAS].set(EPOCH_KEY, time.time_ns(), None)
+
+
+def get_stats():
+    """Hit/miss counters for this process"""
+    lookups = stats['hits'] + stats['misses']
+    return {
+        **stats,
+        'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+    }
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DateField, ExpressionWrapper, F, Max, Min
+from goals import cache as goal_cache
+from goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Backfill the stored end_date column from start_date and duration'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of primary keys covered by each UPDATE batch'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bounds = Goal.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        updated = 0
+
+        if bounds['min_id'] is not None:
+            for low in range(bounds['min_id'], bounds['max_id'] + 1, chunk_size):
+                chunk = Goal.objects.filter(id__gte=low, id__lt=low + chunk_size)
+                with transaction.atomic():
+                    updated += self.backfill_chunk(chunk)
+
+        if updated:
+            goal_cache.invalidate_all_goals()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled end_date on {updated} goals')
+        )
+
+    def backfill_chunk(self, chunk):
+        updated = 0
+        for duration, _ in Goal.DURATION_CHOICES:
+            days = Goal(duration=duration).get_duration_days()
+            goals = chunk.filter(duration=duration)
+            if days is None:
+                updated += goals.exclude(end_date=None).update(end_date=None)
+                continue
+            updated += goals.update(
+                end_date=ExpressionWrapper(
+                    F('start_date') + timedelta(days=days),
+                    output_field=DateField()
+                )
+            )
+        return updated
@@ -0,0 +1,292 @@
+import io
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from goal_sharing.models import GoalSharing
+from goals import cache as goal_cache
+from goals.models import Goal, GoalAttendance, GoalAttendanceStats
+from users.models import User
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and record query counts, latency and '
+        'allocations for every API route'
+    )
+
+    def add_arguments(self, parser):
+        self.add_seed_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON results')
+        parser.add_argument('--baseline', help='Previous results file to compare against')
+        parser.add_argument(
+            '--query-slack',
+            type=int,
+            default=0,
+            help='Extra queries per request allowed over the baseline'
+        )
+        parser.add_argument(
+            '--latency-tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative p95 latency increase over the baseline'
+        )
+
+    def add_seed_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Number of users to seed')
+        parser.add_argument('--goals-per-user', type=int, default=10, help='Goals owned by each user')
+        parser.add_argument('--share-fraction', type=float, default=0.3, help='Fraction of goals shared with a partner')
+        parser.add_argument('--attendance-days', type=int, default=30, help='Days of attendance history per goal')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated data')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            self.seed(options)
+            results = {
+                'config': {
+                    key: options[key]
+                    for key in ('users', 'goals_per_user', 'share_fraction', 'attendance_days', 'iterations', 'seed')
+                },
+                'routes': {
+                    name: self.measure(request, options['iterations'], self.resets().get(name))
+                    for name, request in self.routes()
+                },
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+        for name, result in results['routes'].items():
+            self.stdout.write(
+                f'{name:<24} status={result["status"]} queries={result["queries"]:<3} '
+                f'p50={result["p50_ms"]:.2f}ms p95={result["p95_ms"]:.2f}ms '
+                f'peak_alloc={result["peak_alloc_kb"]:.1f}KiB'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Wrote results to {options["output"]}'))
+
+        if options['baseline']:
+            self.compare(results, options)
+
+    def seed(self, options):
+        """Create users, goals, shares and attendance history with bulk inserts"""
+        today = timezone.now().date()
+        password = make_password(BENCHMARK_PASSWORD)
+        User.objects.bulk_create([
+            User(email=f'user{index}@example.com', username=f'user{index}', password=password)
+            for index in range(options['users'])
+        ])
+        users = list(User.objects.order_by('id'))
+
+        goals = []
+        for user in users:
+            for index in range(options['goals_per_user']):
+                goal = Goal(
+                    user=user,
+                    title=f'{user.username} goal {index}',
+                    duration=random.choice([duration for duration, _ in Goal.DURATION_CHOICES]),
+                    start_date=today - timedelta(days=options['attendance_days'])
+                )
+                goal.end_date = goal.get_end_date()
+                goal.status = goal.determine_status(today)
+                goal.progress_percentage = goal.calculate_progress()
+                goals.append(goal)
+        Goal.objects.bulk_create(goals)
+        goals = list(Goal.objects.order_by('id'))
+
+        shares = []
+        partners = {}
+        for goal in goals:
+            if len(users) > 1 and random.random() < options['share_fraction']:
+                partner = random.choice([user for user in users if user.id != goal.user_id])
+                partners[goal.id] = partner
+                shares.append(GoalSharing(
+                    goal=goal,
+                    shared_by_user_id=goal.user_id,
+                    shared_to_user=partner,
+                    invitation_code=f'A{goal.id:07d}',
+                    status='accepted'
+                ))
+        GoalSharing.objects.bulk_create(shares)
+
+        attendances = []
+        for goal in goals:
+            members = [goal.user_id]
+            if goal.id in partners:
+                members.append(partners[goal.id].id)
+            for offset in range(1, options['attendance_days'] + 1):
+                for member in members:
+                    if random.random() < 0.8:
+                        attendances.append(GoalAttendance(
+                            goal=goal,
+                            user_id=member,
+                            date=today - timedelta(days=offset)
+                        ))
+        GoalAttendance.objects.bulk_create(attendances, batch_size=1000)
+        call_command('rebuild_attendance_stats', stdout=io.StringIO())
+        call_command('rebuild_goal_memberships', stdout=io.StringIO())
+
+        self.owner = users[0]
+        self.partner = users[1] if len(users) > 1 else users[0]
+        self.goal = Goal.objects.filter(user=self.owner).order_by('id').first()
+        self.invitation = GoalSharing.objects.create(
+            goal=self.goal,
+            shared_by_user=self.owner,
+            invitation_code='BENCHINV',
+            status='pending'
+        )
+        self.refresh = str(RefreshToken.for_user(self.owner))
+
+        # State check-in routes change, restored before each timed request
+        self.owner_goal_ids = list(Goal.objects.filter(user=self.owner).values_list('id', flat=True))
+        self.seeded_goals = list(Goal.objects.filter(pk__in=self.owner_goal_ids))
+        self.seeded_stats = list(GoalAttendanceStats.objects.filter(goal_id__in=self.owner_goal_ids))
+
+    def client(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.owner).access_token}'
+        )
+        return client
+
+    def routes(self):
+        """(name, callable) pairs issuing one request each"""
+        goal_url = f'/api/goals/{self.goal.id}/'
+        owner_goal_ids = self.owner_goal_ids
+        new_goal = {
+            'title': 'Benchmark goal',
+            'duration': 'month',
+            'start_date': timezone.now().date().isoformat(),
+        }
+        return [
+            ('goal_list', lambda client: client.get('/api/goals/')),
+            ('goal_retrieve', lambda client: client.get(goal_url)),
+            ('goal_create', lambda client: client.post('/api/goals/', new_goal, format='json')),
+            ('goal_mark_attendance', lambda client: client.post(f'{goal_url}mark_attendance/')),
+            ('goal_mark_attendance_bulk', lambda client: client.post(
+                '/api/goals/mark_attendance_bulk/', {'goal_ids': owner_goal_ids}, format='json'
+            )),
+            ('goal_increment_attendance', lambda client: client.post(f'{goal_url}increment_attendance/')),
+            ('goal_attendance_history', lambda client: client.get(f'{goal_url}attendance_history/')),
+            ('goal_update_all_statuses', lambda client: client.post('/api/goals/update_all_statuses/')),
+            ('goal_join_shared_goal', lambda client: client.post(
+                '/api/goals/join_shared_goal/',
+                {'invitation_code': self.invitation.invitation_code, 'action': 'check'},
+                format='json'
+            )),
+            ('sharing_create', lambda client: client.post(
+                '/api/goal-sharing/', {'goal': self.goal.id}, format='json'
+            )),
+            ('sharing_list', lambda client: client.get('/api/goal-sharing/')),
+            ('user_list', lambda client: client.get('/api/users/')),
+            ('user_me', lambda client: client.get('/api/users/me/')),
+            ('token_obtain', lambda client: client.post(
+                '/api/token/',
+                {'email': self.owner.email, 'password': BENCHMARK_PASSWORD},
+                format='json'
+            )),
+            ('token_refresh', lambda client: client.post(
+                '/api/token/refresh/', {'refresh': self.refresh}, format='json'
+            )),
+        ]
+
+    def resets(self):
+        """Per-route callables run before every request, outside the timed window"""
+        # Without these only the warm-up would check in; every timed request
+        # would take the "already marked" path and skip the insert, counter
+        # UPDATE and stats writes
+        return {
+            'goal_mark_attendance': self.reset_check_ins,
+            'goal_mark_attendance_bulk': self.reset_check_ins,
+        }
+
+    def reset_check_ins(self):
+        """Undo today's check-ins on the owner's goals"""
+        GoalAttendance.objects.filter(
+            goal_id__in=self.owner_goal_ids, date=timezone.now().date()
+        ).delete()
+        Goal.objects.bulk_update(self.seeded_goals, [*Goal.DERIVED_FIELDS, 'attendance_count'])
+        GoalAttendanceStats.objects.bulk_update(self.seeded_stats, GoalAttendanceStats.STAT_FIELDS)
+        goal_cache.invalidate_goals(self.owner_goal_ids)
+
+    def measure(self, request, iterations, reset=None):
+        client = self.client()
+        reset = reset or (lambda: None)
+
+        # Warm up caches and lazy imports before anything is recorded
+        reset()
+        request(client)
+
+        timings = []
+        query_counts = []
+        for _ in range(iterations):
+            reset()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request(client)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+
+        # Allocation tracing slows requests down, so it gets its own pass
+        reset()
+        tracemalloc.start()
+        request(client)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'status': response.status_code,
+            'queries': max(query_counts),
+            'p50_ms': statistics.median(timings),
+            'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            'peak_alloc_kb': peak / 1024,
+        }
+
+    def compare(self, results, options):
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = []
+        for name, result in results['routes'].items():
+            previous = baseline.get('routes', {}).get(name)
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries'] + options['query_slack']:
+                regressions.append(
+                    f'{name}: {result["queries"]} queries (baseline {previous["queries"]})'
+                )
+            if result['p95_ms'] > previous['p95_ms'] * (1 + options['latency_tolerance']):
+                regressions.append(
+                    f'{name}: p95 {result["p95_ms"]:.2f}ms (baseline {previous["p95_ms"]:.2f}ms)'
+                )
+
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
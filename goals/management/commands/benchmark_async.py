@@ -0,0 +1,139 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import benchmark_api
+
+
+class Command(benchmark_api.Command):
+    help = (
+        'Seed a throwaway test database and compare throughput of the hot read endpoints '
+        'served through WSGI and sync views against ASGI and async views'
+    )
+
+    def add_arguments(self, parser):
+        self.add_seed_arguments(parser)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[1, 8, 32],
+            help='In-flight requests to compare at'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route and concurrency level')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            self.seed(options)
+            self.token = str(RefreshToken.for_user(self.owner).access_token)
+            goal_url = f'/api/goals/{self.goal.id}/'
+            paths = [
+                ('goal_list', '/api/goals/'),
+                ('goal_retrieve', goal_url),
+                ('goal_attendance_history', f'{goal_url}attendance_history/'),
+                ('user_me', '/api/users/me/'),
+            ]
+            for name, path in paths:
+                for concurrency in options['concurrency']:
+                    wsgi = self.run_wsgi(path, concurrency, options['requests'])
+                    with override_settings(ROOT_URLCONF='harumada.async_urls'):
+                        asgi = self.run_asgi(path, concurrency, options['requests'])
+                    self.stdout.write(
+                        f'{name:<24} concurrency={concurrency:<3} '
+                        f'wsgi={wsgi:8.1f} req/s  asgi={asgi:8.1f} req/s  ({asgi / wsgi:.2f}x)'
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def check_statuses(self, path, statuses):
+        failed = [status for status in statuses if not str(status).startswith('200')]
+        if failed:
+            raise CommandError(f'{path} answered {failed[0]}')
+
+    def run_wsgi(self, path, concurrency, requests):
+        """Requests per second with `concurrency` worker threads, like a threaded WSGI server"""
+        handler = WSGIHandler()
+        environ = {
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+            'HTTP_HOST': '127.0.0.1',
+            'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+        }
+        setup_testing_defaults(environ)
+
+        def request(_):
+            statuses = []
+            b''.join(handler(dict(environ), lambda status, headers, exc_info=None: statuses.append(status)))
+            return statuses[0]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            statuses = list(pool.map(request, range(requests)))
+        elapsed = time.perf_counter() - started
+        self.check_statuses(path, statuses)
+        return requests / elapsed
+
+    def run_asgi(self, path, concurrency, requests):
+        """Requests per second with `concurrency` requests in flight on one event loop"""
+        handler = ASGIHandler()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'127.0.0.1'), (b'authorization', f'Bearer {self.token}'.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('127.0.0.1', 80),
+        }
+
+        async def request(limit):
+            async with limit:
+                statuses = []
+                received = asyncio.Event()
+
+                async def receive():
+                    if received.is_set():
+                        # The client never disconnects early
+                        await asyncio.Future()
+                    received.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        statuses.append(message['status'])
+
+                await handler(dict(scope), receive, send)
+                return statuses[0]
+
+        async def run():
+            limit = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*[request(limit) for _ in range(requests)])
+
+        started = time.perf_counter()
+        statuses = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        self.check_statuses(path, statuses)
+        return requests / elapsed
@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI app and serve one request
+CHILD_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from harumada.wsgi import application
+imported = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET', 'HTTP_HOST': '127.0.0.1'}
+setup_testing_defaults(environ)
+statuses = []
+b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+responded = time.perf_counter()
+print(json.dumps({
+    'status': statuses[0],
+    'import_ms': (imported - started) * 1000,
+    'first_response_ms': (responded - imported) * 1000,
+    'modules': len(sys.modules),
+}))
+'''
+
+IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Start fresh interpreters for each settings module and report time-to-first-response '
+        'of the WSGI app, optionally with an import-time profile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-modules',
+            nargs='+',
+            default=['harumada.settings', 'harumada.settings_api'],
+            help='Settings modules to compare'
+        )
+        parser.add_argument('--runs', type=int, default=10, help='Cold starts per settings module')
+        parser.add_argument('--path', default='/api/goals/', help='Path of the first request')
+        parser.add_argument(
+            '--import-profile',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Also print the N slowest top-level imports of each settings module'
+        )
+
+    def handle(self, *args, **options):
+        results = {module: [] for module in options['settings_modules']}
+
+        # Interleave runs so disk cache and CPU frequency drift hit every module alike
+        for _ in range(options['runs']):
+            for module in results:
+                results[module].append(self.cold_start(module, options['path']))
+
+        for module, runs in results.items():
+            self.stdout.write(
+                f'{module:<24} status={runs[0]["status"]:<18} modules={runs[0]["modules"]:<5} '
+                f'process={self.median(runs, "process_ms"):.1f}ms '
+                f'import={self.median(runs, "import_ms"):.1f}ms '
+                f'first_response={self.median(runs, "first_response_ms"):.1f}ms '
+                f'time_to_first_response={self.median(runs, "ready_ms"):.1f}ms'
+            )
+            if options['import_profile']:
+                self.print_import_profile(module, options['path'], options['import_profile'])
+
+    def median(self, runs, key):
+        return statistics.median(run[key] for run in runs)
+
+    def run_child(self, module, path, *python_args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': module}
+        return subprocess.run(
+            [sys.executable, *python_args, '-c', CHILD_SCRIPT, path],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+
+    def cold_start(self, module, path):
+        started = time.perf_counter()
+        completed = self.run_child(module, path)
+        process_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            raise CommandError(f'{module} failed to start:\n{completed.stderr}')
+        timings = json.loads(completed.stdout.splitlines()[-1])
+        timings['ready_ms'] = timings['import_ms'] + timings['first_response_ms']
+        timings['process_ms'] = process_ms
+        return timings
+
+    def print_import_profile(self, module, path, limit):
+        completed = self.run_child(module, path, '-X', 'importtime')
+        top_level = []
+        for line in completed.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            # One space of indentation marks imports made directly by the child script
+            if match and len(match.group(3)) == 1:
+                top_level.append((int(match.group(2)), match.group(4)))
+        for cumulative_us, name in sorted(top_level, reverse=True)[:limit]:
+            self.stdout.write(f'    {cumulative_us / 1000:8.1f}ms  {name}')
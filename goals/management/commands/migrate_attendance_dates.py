@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from goals import cache as goal_cache
+from goals.models import Goal, GoalAttendance
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Copy legacy attendance_dates JSON history into GoalAttendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of goals migrated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        goals = Goal.objects.exclude(attendance_dates={}).order_by('id')
+        usernames = {}
+        copied = 0
+        skipped = 0
+        last_id = 0
+
+        while True:
+            batch = list(
+                goals.filter(id__gt=last_id).values_list('id', 'attendance_dates')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            missing = {
+                username
+                for _, attendance_dates in batch
+                for attendees in (attendance_dates or {}).values()
+                for username in attendees
+                if username not in usernames
+            }
+            usernames.update(
+                User.objects.filter(username__in=missing).values_list('username', 'id')
+            )
+
+            rows = []
+            for goal_id, attendance_dates in batch:
+                for date_str, attendees in (attendance_dates or {}).items():
+                    for username in attendees:
+                        if username not in usernames:
+                            skipped += 1
+                            continue
+                        rows.append(GoalAttendance(
+                            goal_id=goal_id,
+                            user_id=usernames[username],
+                            date=date.fromisoformat(date_str)
+                        ))
+
+            with transaction.atomic():
+                GoalAttendance.objects.bulk_create(rows, ignore_conflicts=True)
+            copied += len(rows)
+
+        if copied:
+            goal_cache.invalidate_all_goals()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Copied {copied} attendance rows '
+                f'(duplicates ignored, {skipped} skipped for unknown users)'
+            )
+        )
@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from goal_sharing.models import GoalSharing
+from goals.models import Goal, GoalAttendance, GoalAttendanceStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute every goal\'s attendance statistics from its attendance history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of goals rebuilt per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rebuilt = 0
+        last_id = 0
+
+        while True:
+            goal_ids = list(
+                Goal.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not goal_ids:
+                break
+            last_id = goal_ids[-1]
+
+            with transaction.atomic():
+                rebuilt += self.rebuild_batch(goal_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt attendance stats for {rebuilt} goals')
+        )
+
+    def rebuild_batch(self, goal_ids):
+        daily_counts = defaultdict(dict)
+        rows = GoalAttendance.objects.filter(goal_id__in=goal_ids).values(
+            'goal_id', 'date'
+        ).annotate(count=Count('id')).order_by()
+        for row in rows:
+            daily_counts[row['goal_id']][row['date']] = row['count']
+
+        shared = set(
+            GoalSharing.objects.filter(goal_id__in=goal_ids, status='accepted')
+            .values_list('goal_id', flat=True)
+        )
+
+        stats = [
+            GoalAttendanceStats.build(goal_id, daily_counts[goal_id], 2 if goal_id in shared else 1)
+            for goal_id in goal_ids
+        ]
+        GoalAttendanceStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['goal'],
+            update_fields=GoalAttendanceStats.STAT_FIELDS + ['updated_at']
+        )
+        return len(stats)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from goals.models import Goal, GoalMembership
+
+
+class Command(BaseCommand):
+    help = 'Recompute who can see each goal from goal owners and accepted shares'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of goals rebuilt per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rebuilt = 0
+        last_id = 0
+
+        while True:
+            goal_ids = list(
+                Goal.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not goal_ids:
+                break
+            last_id = goal_ids[-1]
+
+            with transaction.atomic():
+                rebuilt += GoalMembership.rebuild(goal_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} goal memberships')
+        )
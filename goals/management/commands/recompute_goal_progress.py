@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Recompute progress and boat stages for all goals in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of goals read and written per batch'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run the per-instance calculate_progress() path, check both agree and compare timings'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+
+        if options['compare']:
+            self.compare(today)
+
+        started = time.monotonic()
+        updated = Goal.objects.all().recompute_progress(chunk_size=options['chunk_size'], today=today)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Recomputed progress, updated {updated} goals in {elapsed:.2f}s')
+        )
+
+    def compare(self, today):
+        fields = ('id', 'duration', 'start_date', 'status', 'attendance_count')
+
+        started = time.monotonic()
+        per_instance = {}
+        for goal in Goal.objects.only(*fields).order_by('id'):
+            progress = goal.calculate_progress()
+            per_instance[goal.id] = (progress, goal.current_stage, goal.next_stage)
+        instance_elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        tables = Goal.progress_tables()
+        batched = {
+            row[0]: Goal.progress_from_tables(tables, today, *row[1:])
+            for row in Goal.objects.order_by('id').values_list(*fields).iterator(chunk_size=2000)
+        }
+        batch_elapsed = time.monotonic() - started
+
+        mismatches = [goal_id for goal_id, result in per_instance.items() if batched.get(goal_id) != result]
+        if mismatches:
+            raise CommandError(f'Batch results differ from calculate_progress() for goals {mismatches[:20]}')
+
+        speedup = instance_elapsed / batch_elapsed if batch_elapsed > 0 else float('inf')
+        self.stdout.write(
+            f'{len(per_instance)} goals: per-instance {instance_elapsed:.3f}s, '
+            f'batched {batch_elapsed:.3f}s ({speedup:.1f}x)'
+        )
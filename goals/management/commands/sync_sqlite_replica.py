@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the local SQLite primary into the SQLite file standing in for the read replica'
+
+    def handle(self, *args, **options):
+        if 'replica' not in connections.settings:
+            raise CommandError('No replica database configured, set SQLITE_REPLICA_PATH')
+
+        primary = connections.settings['default']
+        replica = connections.settings['replica']
+        if connections['default'].vendor != 'sqlite' or connections['replica'].vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries and replicas can be synced this way')
+
+        source = sqlite3.connect(str(primary['NAME']))
+        target = sqlite3.connect(str(replica['NAME']))
+        try:
+            # The backup API copies a consistent snapshot even while the primary is in use
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Copied {primary["NAME"]} to {replica["NAME"]}')
+        )
@@ -1,34 +1,150 @@
+import time
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min, Q
 from django.utils import timezone
+from goals import cache as goal_cache
 from goals.models import Goal
 
+
 class Command(BaseCommand):
-    help = 'Update goal statuses based on dates'
+    help = 'Update goal statuses and progress based on dates'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of primary keys covered by each UPDATE batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many goals would change without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
         today = timezone.now().date()
-        
-        # Update pending to in_progress
-        pending_updated = Goal.objects.filter(
-            start_date__lte=today,
-            status='pending'
-        ).update(status='in_progress')
-        
-        # Update in_progress to done
-        done_updated = 0
-        in_progress_goals = Goal.objects.filter(status='in_progress')
-        
-        for goal in in_progress_goals:
-            if goal.duration != 'unlimited':
-                end_date = goal.get_end_date()
-                if today >= end_date:
-                    goal.status = 'done'
-                    goal.save()
-                    done_updated += 1
-        
+        started = time.monotonic()
+
+        bounds = Goal.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        totals = {'in_progress': 0, 'done': 0, 'progress': 0}
+
+        if bounds['min_id'] is not None:
+            for low in range(bounds['min_id'], bounds['max_id'] + 1, chunk_size):
+                chunk = Goal.objects.filter(id__gte=low, id__lt=low + chunk_size)
+                if dry_run:
+                    counts = self.count_chunk(chunk, today)
+                else:
+                    with transaction.atomic():
+                        counts = self.sweep_chunk(chunk, today)
+                for key, value in counts.items():
+                    totals[key] += value
+
+        if not dry_run and any(totals.values()):
+            goal_cache.invalidate_all_goals()
+
+        elapsed = time.monotonic() - started
+        rows = sum(totals.values())
+        rate = rows / elapsed if elapsed > 0 else 0
+        prefix = '[dry run] Would update' if dry_run else 'Updated'
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'Updated {pending_updated} goals to in_progress and '
-                f'{done_updated} goals to done'
+                f'{prefix} {totals["in_progress"]} goals to in_progress, '
+                f'{totals["done"]} goals to done and '
+                f'{totals["progress"]} progress rows '
+                f'in {elapsed:.2f}s ({rate:.0f} rows/s)'
             )
-        )
\ No newline at end of file
+        )
+
+    def done_filter(self, today):
+        """Q matching goals whose end date has been reached"""
+        return Q(end_date__lte=today)
+
+    def duration_days(self):
+        """Map each limited duration to its length in days"""
+        days = {}
+        for duration, _ in Goal.DURATION_CHOICES:
+            duration_days = Goal(duration=duration).get_duration_days()
+            if duration_days is not None:
+                days[duration] = duration_days
+        return days
+
+    def count_chunk(self, chunk, today):
+        done_filter = self.done_filter(today)
+        open_goals = chunk.filter(status__in=['pending', 'in_progress'])
+        active = open_goals.filter(start_date__lte=today).exclude(done_filter)
+        return {
+            'in_progress': active.filter(status='pending').count(),
+            'done': open_goals.filter(done_filter).count(),
+            'progress': sum(stale.count() for stale, _ in self.stale_progress(active, today)),
+        }
+
+    def sweep_chunk(self, chunk, today):
+        now = timezone.now()
+        done_updated = chunk.filter(
+            status__in=['pending', 'in_progress']
+        ).filter(self.done_filter(today)).update(
+            status='done',
+            progress_percentage=100,
+            current_stage='boat6',
+            next_stage='boat6',
+            updated_at=now
+        )
+        in_progress_updated = chunk.filter(
+            status='pending',
+            start_date__lte=today
+        ).update(status='in_progress', updated_at=now)
+
+        active = chunk.filter(status='in_progress', start_date__lte=today)
+        progress_updated = sum(
+            stale.update(**updates, updated_at=now)
+            for stale, updates in self.stale_progress(active, today)
+        )
+        return {
+            'in_progress': in_progress_updated,
+            'done': done_updated,
+            'progress': progress_updated,
+        }
+
+    def elapsed_buckets(self, today, days):
+        """Group start dates of a limited duration into runs with equal progress"""
+        buckets = []
+        for elapsed in range(days):
+            progress = round(min(100, max(0, (elapsed / days) * 100)))
+            start_date = today - timedelta(days=elapsed)
+            if buckets and buckets[-1][0] == progress:
+                buckets[-1][1]['start_date__gte'] = start_date
+            else:
+                buckets.append((progress, {
+                    'start_date__gte': start_date,
+                    'start_date__lte': start_date,
+                }))
+        return buckets
+
+    def stale_progress(self, active, today):
+        """Yield (queryset, updates) pairs that write progress and boat stages,
+        one UPDATE per duration.
+
+        Rows already holding their bucket's values are left out, so a rerun
+        on an unchanged day writes nothing and --dry-run counts exactly the
+        rows the sweep would write.
+        """
+        batches = [
+            (active.filter(duration=duration), self.elapsed_buckets(today, days))
+            for duration, days in self.duration_days().items()
+        ]
+        batches.append((active.filter(duration='unlimited'), Goal.attendance_progress_buckets()))
+        for queryset, buckets in batches:
+            if not buckets:
+                continue
+            updates = Goal.progress_case_updates(buckets)
+            stale = queryset.alias(
+                **{f'new_{field}': expression for field, expression in updates.items()}
+            ).exclude(**{field: F(f'new_{field}') for field in updates})
+            yield stale, updates
@@ -1,11 +1,222 @@
-from django.db import models
+import copy
+import logging
+import random
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import timedelta, datetime
+from . import cache as goal_cache
+from .attendance import AttendanceCalendar
 
 User = get_user_model()
 
+status_logger = logging.getLogger('goals.status')
+
+# Check-ins needed for an unlimited goal to reach 100%
+UNLIMITED_TARGET_ATTENDANCE = 30
+
+class DaysBetween(models.Func):
+    """Whole days from the second date expression to the first"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS integer)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+class LiveProgressIterable(models.query.ModelIterable):
+    """Yield goals with stored derived fields replaced by their with_live_progress() values"""
+    def __iter__(self):
+        for goal in super().__iter__():
+            goal.apply_live_progress()
+            yield goal
+
+class GoalQuerySet(models.QuerySet):
+    def with_sharing(self, prefix=''):
+        """Load owners and accepted shares up front so serializing goals doesn't query per row"""
+        GoalSharing = apps.get_model('goal_sharing', 'GoalSharing')
+        return self.select_related(f'{prefix}user').prefetch_related(
+            models.Prefetch(
+                f'{prefix}shares',
+                queryset=GoalSharing.objects.filter(status='accepted').select_related('shared_to_user'),
+                to_attr='accepted_shares'
+            )
+        )
+
+    def recompute_progress(self, chunk_size=2000, today=None):
+        """Recompute progress and boat stages for every goal in this queryset in batches.
+
+        Rows are read as plain tuples in primary-key chunks, progress comes from
+        per-duration lookup tables instead of per-instance branching, and only
+        changed rows are written back. Returns the number of goals updated.
+        """
+        today = today or timezone.now().date()
+        tables = self.model.progress_tables()
+        updated = 0
+        last_id = 0
+
+        while True:
+            rows = list(
+                self.filter(id__gt=last_id).order_by('id').values_list(
+                    'id', 'duration', 'start_date', 'status', 'attendance_count',
+                    'progress_percentage', 'current_stage', 'next_stage'
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            # Group changed rows by their new values so each chunk needs at
+            # most one UPDATE per distinct (progress, stage, next stage)
+            changed = {}
+            for goal_id, duration, start_date, status, attendance_count, *stored in rows:
+                result = self.model.progress_from_tables(
+                    tables, today, duration, start_date, status, attendance_count
+                )
+                if list(result) != stored:
+                    changed.setdefault(result, []).append(goal_id)
+
+            if changed:
+                now = timezone.now()
+                with transaction.atomic():
+                    for (progress, current_stage, next_stage), ids in changed.items():
+                        updated += self.model.objects.filter(id__in=ids).update(
+                            progress_percentage=progress,
+                            current_stage=current_stage,
+                            next_stage=next_stage,
+                            updated_at=now
+                        )
+                goal_cache.invalidate_goals([goal_id for ids in changed.values() for goal_id in ids])
+
+        return updated
+
+    def with_live_progress(self, today=None):
+        """Compute status, day count, progress and boat stages in the database as of today.
+
+        The stored columns are only as fresh as the last write; goals loaded
+        from this queryset carry the current values instead, so reads never
+        need to save. Mirrors save(): determine_status() then calculate_progress().
+        end_date is not recomputed; it only depends on start_date and duration.
+        """
+        today = today or timezone.now().date()
+        target = UNLIMITED_TARGET_ATTENDANCE
+        duration_days = {
+            duration: days
+            for duration, days in (
+                (duration, self.model(duration=duration).get_duration_days())
+                for duration, _ in self.model.DURATION_CHOICES
+            )
+            if days is not None
+        }
+
+        elapsed = DaysBetween(models.Value(today, output_field=models.DateField()), models.F('start_date'))
+        days = models.Case(
+            *[models.When(duration=duration, then=models.Value(count)) for duration, count in duration_days.items()],
+            default=None,
+            output_field=models.IntegerField()
+        )
+        not_started = models.Q(start_date__gt=today)
+        done = models.Q()
+        for duration, count in duration_days.items():
+            done |= models.Q(duration=duration, start_date__lte=today - timedelta(days=count))
+
+        # Integer round-half-up; (elapsed / days) * 100 never lands on .5 for
+        # these durations, so this agrees with Python's round()
+        progress = models.Case(
+            models.When(not_started, then=models.Value(0)),
+            models.When(done, then=models.Value(100)),
+            models.When(duration='unlimited', attendance_count__gte=target, then=models.Value(100)),
+            models.When(
+                duration='unlimited',
+                then=(models.F('attendance_count') * 200 + target) / (target * 2)
+            ),
+            default=(elapsed * 200 + days) / (days * 2),
+            output_field=models.IntegerField()
+        )
+
+        # Boat stages follow from progress alone, see apply_live_progress()
+        queryset = self.annotate(
+            live_status=models.Case(
+                models.When(not_started, then=models.Value('pending')),
+                models.When(done, then=models.Value('done')),
+                default=models.Value('in_progress'),
+                output_field=models.CharField()
+            ),
+            live_day_count=elapsed + 1,
+            live_progress_percentage=progress,
+        )
+
+        queryset._iterable_class = LiveProgressIterable
+        return queryset
+
+    def with_today_attendance(self, prefix=''):
+        """Load today's attendance rows so status and attendee fields don't query per row"""
+        return self.prefetch_related(
+            models.Prefetch(
+                f'{prefix}attendances',
+                queryset=GoalAttendance.objects.filter(
+                    date=timezone.now().date()
+                ).select_related('user'),
+                to_attr='today_attendances'
+            )
+        )
+
+    def mark_attendance(self, user):
+        """Mark today's attendance for `user` on every goal in this queryset.
+
+        Returns {goal_id: (created, attendance_status)} like Goal.mark_attendance(),
+        using one locking read, one bulk insert and one counter UPDATE.
+        """
+        today = timezone.now().date()
+        with transaction.atomic():
+            goals = list(
+                self.model.objects.select_for_update(of=('self',)).filter(
+                    pk__in=self.order_by().values('pk')
+                ).with_sharing().with_today_attendance()
+            )
+            # Goal.mark_attendance() takes the goal lock before inserting too, so
+            # the rows prefetched under the lock are all of today's rows
+            new_attendances = [
+                GoalAttendance(goal=goal, user=user, date=today)
+                for goal in goals
+                if all(attendance.user_id != user.id for attendance in goal.today_attendances)
+            ]
+            GoalAttendance.objects.bulk_create(new_attendances, ignore_conflicts=True)
+
+            created_ids = [attendance.goal_id for attendance in new_attendances]
+            if created_ids:
+                self.model.objects.filter(pk__in=created_ids).update(
+                    attendance_count=models.F('attendance_count') + 1,
+                    updated_at=timezone.now(),
+                    **self.model.progress_case_updates(
+                        self.model.attendance_progress_buckets(increment=1),
+                        condition=models.Q(duration='unlimited', start_date__lte=today)
+                    )
+                )
+                goal_cache.invalidate_goals(created_ids)
+                GoalAttendanceStats.record_check_ins(
+                    {attendance.goal_id: attendance.goal.get_total_users() for attendance in new_attendances},
+                    today
+                )
+
+        for attendance in new_attendances:
+            attendance.user = user
+            attendance.goal.today_attendances.append(attendance)
+        return {
+            goal.pk: (goal.pk in created_ids, goal.get_today_attendance_status())
+            for goal in goals
+        }
+
 class Goal(models.Model):
     DURATION_CHOICES = [
         ('week', '일주일'),
@@ -37,6 +248,7 @@ class Goal(models.Model):
     message = models.TextField(null=True, blank=True)
     duration = models.CharField(max_length=10, choices=DURATION_CHOICES)
     start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)  # Derived from start_date and duration
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -63,20 +275,70 @@ class Goal(models.Model):
     )
     attendance_count = models.IntegerField(default=0)
     
-    # Add attendance fields
+    # Legacy attendance storage, superseded by GoalAttendance rows
     attendance_dates = models.JSONField(default=dict)  # Stores dates and users who attended
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GoalQuerySet.as_manager()
+
+    # Fields whose changes require recomputing the derived fields below
+    DERIVED_FROM = ('start_date', 'duration', 'status', 'attendance_count')
+    DERIVED_FIELDS = ('end_date', 'status', 'progress_percentage', 'current_stage', 'next_stage')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Store original values to check for changes
-        self._original_status = self.status if hasattr(self, 'status') else None
+        self._loaded_values = {}
+        self.snapshot_loaded_values()
+
+    def snapshot_loaded_values(self, fields=None):
+        """Remember current values of loaded fields as the saved state"""
+        for field in self._meta.concrete_fields:
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                value = self.__dict__[field.attname]
+                # JSON values are mutable; a shared reference would hide in-place edits
+                if isinstance(field, models.JSONField):
+                    value = copy.deepcopy(value)
+                self._loaded_values[field.attname] = value
+
+    def get_dirty_fields(self):
+        """Get names of loaded fields that differ from the saved state"""
+        dirty = set()
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in self._loaded_values or \
+               self.__dict__[field.attname] != self._loaded_values[field.attname]:
+                dirty.add(field.name)
+        return dirty
 
     def is_dirty(self):
         """Check if the model has unsaved changes"""
-        return self.status != self._original_status
+        return bool(self.get_dirty_fields())
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_loaded_values(fields)
+
+    # Columns with_live_progress() recomputes, read from its live_<field> annotations
+    LIVE_FIELDS = ('status', 'progress_percentage', 'current_stage', 'next_stage')
+
+    def has_live_progress(self):
+        """Whether this instance was loaded through GoalQuerySet.with_live_progress()"""
+        return 'live_progress_percentage' in self.__dict__
+
+    def apply_live_progress(self):
+        """Replace stored derived fields with the annotated live values, if loaded"""
+        for field in self.LIVE_FIELDS:
+            live_name = f'live_{field}'
+            if live_name in self.__dict__:
+                setattr(self, field, self.__dict__[live_name])
+        if self.has_live_progress():
+            self.current_stage, self.next_stage = self.determine_stages(self.live_progress_percentage)
 
     def get_duration_days(self):
         """Convert duration choice to number of days"""
@@ -90,7 +352,8 @@ class Goal(models.Model):
         }
         return duration_mapping.get(self.duration)
 
-    def determine_stages(self, progress):
+    @staticmethod
+    def determine_stages(progress):
         """Determine current and next boat stages based on progress percentage"""
         if progress < 20:
             return 'boat1', 'boat2'
@@ -116,54 +379,49 @@ class Goal(models.Model):
             
         return self.start_date + timedelta(days=duration_days)
 
-    @property
-    def end_date(self):
-        """Property to access end_date easily"""
-        return self.get_end_date()
+    def determine_status(self, today):
+        """Determine status for the given date"""
+        # If goal hasn't started yet
+        if today < self.start_date:
+            return 'pending'
+            
+        # If goal has unlimited duration
+        if self.duration == 'unlimited':
+            return 'in_progress'
+            
+        # Update status based on dates
+        if today >= self.get_end_date():
+            return 'done'
+        return 'in_progress'
 
     def update_status(self):
         """Update status based on dates"""
+        # Logging is off on the hot path unless the goals logger is enabled
+        log_transitions = status_logger.isEnabledFor(logging.INFO)
+        started = time.perf_counter() if log_transitions else None
         today = timezone.now().date()
         
         # Convert start_date to date object if it isn't already
         if isinstance(self.start_date, str):
             self.start_date = datetime.strptime(self.start_date, '%Y-%m-%d').date()
         
-        # Debug prints
-        print(f"Today: {today} (type: {type(today)})")
-        print(f"Start date: {self.start_date} (type: {type(self.start_date)})")
-        print(f"Duration: {self.duration}")
-        print(f"Current status: {self.status}")
-        
-        # If goal hasn't started yet
-        if today < self.start_date:
-            print("Goal hasn't started yet")
-            self.status = 'pending'
-            return
-            
-        # If goal has unlimited duration
-        if self.duration == 'unlimited':
-            print("Unlimited duration goal")
-            if today >= self.start_date:
-                self.status = 'in_progress'
-            return
-            
-        # Calculate end date
-        end_date = self.get_end_date()
-        print(f"End date: {end_date}")
-        
-        # Update status based on dates
-        if today >= end_date:
-            print("Goal is done")
-            self.status = 'done'
-        elif today >= self.start_date:
-            print("Goal is in progress")
-            self.status = 'in_progress'
-        else:
-            print("Goal is pending")
-            self.status = 'pending'
-        
-        print(f"New status: {self.status}")
+        old_status = self.status
+        self.status = self.determine_status(today)
+
+        if log_transitions and self.status != old_status and \
+           random.random() < settings.GOAL_STATUS_LOG_SAMPLE_RATE:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            status_logger.info(
+                'status transition goal_id=%s old_status=%s new_status=%s '
+                'duration=%s start_date=%s elapsed_ms=%.3f',
+                self.pk, old_status, self.status, self.duration, self.start_date, elapsed_ms,
+                extra={
+                    'goal_id': self.pk,
+                    'old_status': old_status,
+                    'new_status': self.status,
+                    'elapsed_ms': elapsed_ms,
+                }
+            )
 
     def calculate_progress(self):
         """Calculate progress based on duration and elapsed time"""
@@ -183,8 +441,7 @@ class Goal(models.Model):
 
         # Handle unlimited duration
         if self.duration == 'unlimited':
-            target_attendance = 30
-            progress = min(100, (self.attendance_count / target_attendance) * 100)
+            progress = min(100, (self.attendance_count / UNLIMITED_TARGET_ATTENDANCE) * 100)
             self.current_stage, self.next_stage = self.determine_stages(progress)
             return round(progress)
 
@@ -196,6 +453,88 @@ class Goal(models.Model):
         self.current_stage, self.next_stage = self.determine_stages(progress)
         return progress
 
+    @classmethod
+    def progress_tables(cls):
+        """Precompute (progress, current_stage, next_stage) for every reachable input.
+
+        Limited durations are indexed by elapsed days (capped at the duration),
+        'unlimited' by attendance count (capped at the target). Mirrors calculate_progress().
+        """
+        tables = {}
+        for duration, _ in cls.DURATION_CHOICES:
+            days = cls(duration=duration).get_duration_days()
+            if days is None:
+                continue
+            table = []
+            for elapsed in range(days + 1):
+                progress = round(min(100, max(0, (elapsed / days) * 100)))
+                table.append((progress, *cls.determine_stages(progress)))
+            tables[duration] = table
+
+        table = []
+        for count in range(UNLIMITED_TARGET_ATTENDANCE + 1):
+            progress = min(100, (count / UNLIMITED_TARGET_ATTENDANCE) * 100)
+            table.append((round(progress), *cls.determine_stages(progress)))
+        tables['unlimited'] = table
+        return tables
+
+    @classmethod
+    def progress_from_tables(cls, tables, today, duration, start_date, status, attendance_count):
+        """Table lookup equivalent of calculate_progress() for one row"""
+        if today < start_date:
+            return 0, 'boat1', 'boat2'
+        if status == 'done':
+            return 100, 'boat6', 'boat6'
+        table = tables[duration]
+        if duration == 'unlimited':
+            return table[min(attendance_count, UNLIMITED_TARGET_ATTENDANCE)]
+        return table[min((today - start_date).days, len(table) - 1)]
+
+    @classmethod
+    def attendance_progress_buckets(cls, increment=0):
+        """Group stored attendance counts of unlimited goals into runs with equal progress,
+        as of `increment` more check-ins"""
+        target = UNLIMITED_TARGET_ATTENDANCE
+        buckets = []
+        for count in range(max(0, target - increment)):
+            progress = round(min(100, ((count + increment) / target) * 100))
+            buckets.append((progress, {'attendance_count': count}))
+        buckets.append((100, {'attendance_count__gte': max(0, target - increment)}))
+        return buckets
+
+    @classmethod
+    def progress_case_updates(cls, buckets, condition=None):
+        """Build CASE expressions writing progress and boat stages for (progress, lookup) buckets.
+
+        With a `condition`, only matching rows are rewritten and the rest keep their values.
+        """
+        progress_whens = []
+        current_whens = []
+        next_whens = []
+        for progress, lookup in buckets:
+            current_stage, next_stage = cls.determine_stages(progress)
+            match = models.Q(**lookup) if condition is None else condition & models.Q(**lookup)
+            progress_whens.append(models.When(match, then=models.Value(progress)))
+            current_whens.append(models.When(match, then=models.Value(current_stage)))
+            next_whens.append(models.When(match, then=models.Value(next_stage)))
+
+        if condition is None:
+            defaults = (models.Value(100), models.Value('boat6'), models.Value('boat6'))
+        else:
+            defaults = (models.F('progress_percentage'), models.F('current_stage'), models.F('next_stage'))
+
+        return {
+            'progress_percentage': models.Case(
+                *progress_whens, default=defaults[0], output_field=models.IntegerField()
+            ),
+            'current_stage': models.Case(
+                *current_whens, default=defaults[1], output_field=models.CharField()
+            ),
+            'next_stage': models.Case(
+                *next_whens, default=defaults[2], output_field=models.CharField()
+            ),
+        }
+
     def progress_to_next_stage(self):
         """Calculate how much progress is needed to reach next stage"""
         if self.current_stage == 'boat6':
@@ -213,62 +552,120 @@ class Goal(models.Model):
 
     def get_original_goal(self):
         """Get the original goal if this is a shared goal"""
+        if '_original_goal' in self.__dict__:
+            return self._original_goal
+
         # If this is the original goal, return self
         if not hasattr(self, 'shared_from'):
+            self._original_goal = self
             return self
             
         # If this is a shared goal, return the original
         sharing = self.shared_from.first()  # Get the sharing record
-        if sharing:
-            return sharing.goal
-        return self
+        self._original_goal = sharing.goal if sharing else self
+        return self._original_goal
+
+    def get_accepted_share(self):
+        """Get the accepted sharing record, using prefetched shares when available"""
+        if '_accepted_share' in self.__dict__:
+            return self._accepted_share
+
+        if hasattr(self, 'accepted_shares'):
+            sharing = self.accepted_shares[0] if self.accepted_shares else None
+        else:
+            sharing = self.shares.filter(status='accepted').select_related('shared_to_user').first()
+        self._accepted_share = sharing
+        return sharing
+
+    def get_total_users(self):
+        """Number of participants: the owner plus an accepted partner"""
+        return 2 if self.get_accepted_share() else 1
+
+    def clear_sharing_cache(self):
+        """Forget the resolved original goal and accepted share after sharing changes"""
+        for attr in ('_original_goal', '_accepted_share', 'accepted_shares'):
+            self.__dict__.pop(attr, None)
 
     def mark_attendance(self, user):
         """Mark attendance for today"""
-        today = timezone.now().date().isoformat()
+        today = timezone.now().date()
         
         # Get original goal
         original_goal = self.get_original_goal()
         
-        # Initialize attendance_dates if empty
-        if not original_goal.attendance_dates:
-            original_goal.attendance_dates = {}
-        
         # Verify user has permission
-        if user != original_goal.user:
-            sharing = original_goal.shares.filter(
-                shared_to_user=user,
-                status='accepted'
-            ).first()
+        if user.id != original_goal.user_id:
+            sharing = original_goal.get_accepted_share()
+            if not sharing or sharing.shared_to_user_id != user.id:
+                sharing = original_goal.shares.filter(
+                    shared_to_user=user,
+                    status='accepted'
+                ).first()
             if not sharing:
                 raise PermissionError("You don't have permission to mark attendance for this goal")
 
-        # Check if user already marked attendance today
-        today_attendees = original_goal.attendance_dates.get(today, [])
-        if user.username in today_attendees:
-            return False, original_goal.get_today_attendance_status()
+        # Insert today's row, treating the unique constraint as "already marked"
+        with transaction.atomic():
+            # Lock the goal first, like the bulk check-in, so the two never interleave
+            list(Goal.objects.select_for_update().filter(pk=original_goal.pk).order_by().values_list('pk'))
+            try:
+                with transaction.atomic():
+                    GoalAttendance.objects.create(goal=original_goal, user=user, date=today)
+            except IntegrityError:
+                return False, original_goal.get_today_attendance_status()
+            original_goal.increment_attendance()
+            GoalAttendanceStats.record_check_ins(
+                {original_goal.pk: original_goal.get_total_users()}, today
+            )
 
-        # Mark attendance
-        today_attendees.append(user.username)
-        original_goal.attendance_dates[today] = today_attendees
-        original_goal.attendance_count += 1
-        original_goal.save()
+        original_goal.__dict__.pop('today_attendances', None)
 
         return True, original_goal.get_today_attendance_status()
 
+    def increment_attendance(self):
+        """Atomically add one check-in, updating attendance-based progress in the same statement"""
+        updates = {
+            'attendance_count': models.F('attendance_count') + 1,
+            'updated_at': timezone.now(),
+        }
+        if self.duration == 'unlimited' and self.start_date <= timezone.now().date():
+            updates.update(self.progress_case_updates(self.attendance_progress_buckets(increment=1)))
+
+        Goal.objects.filter(pk=self.pk).update(**updates)
+        goal_cache.invalidate_goal(self.pk)
+        self.refresh_from_db(fields=[
+            'attendance_count',
+            'progress_percentage',
+            'current_stage',
+            'next_stage',
+            'updated_at',
+        ])
+
+    def get_today_attendances(self):
+        """Get today's attendance rows, using prefetched rows when available"""
+        if not hasattr(self, 'today_attendances'):
+            self.today_attendances = list(
+                self.attendances.filter(date=timezone.now().date()).select_related('user')
+            )
+        return self.today_attendances
+
+    def get_today_attendees(self):
+        """Get usernames of everyone who attended today"""
+        original_goal = self.get_original_goal()
+        return [attendance.user.username for attendance in original_goal.get_today_attendances()]
+
     def get_today_attendance_status(self):
         """Get attendance status for today"""
         original_goal = self.get_original_goal()
-        today = timezone.now().date().isoformat()
-        today_attendees = original_goal.attendance_dates.get(today, [])
+        attended_ids = {attendance.user_id for attendance in original_goal.get_today_attendances()}
         
         # Get goal sharing if exists
-        sharing = original_goal.shares.filter(status='accepted').first()
+        sharing = original_goal.get_accepted_share()
         
         if sharing:
             # This is a shared goal
-            user_a_attended = original_goal.user.username in today_attendees
-            user_b_attended = sharing.shared_to_user.username in today_attendees
+            user_a_attended = original_goal.user_id in attended_ids
+            user_b_attended = sharing.shared_to_user_id in attended_ids
             
             if user_a_attended and user_b_attended:
                 return "completed"
@@ -277,28 +674,94 @@ class Goal(models.Model):
             return "zero_person_done"
         else:
             # Single user goal
-            return "completed" if original_goal.user.username in today_attendees else "zero_person_done"
+            return "completed" if original_goal.user_id in attended_ids else "zero_person_done"
 
-    def get_attendance_history(self):
-        """Get formatted attendance history"""
+    def get_attendances_between(self, date_from=None, date_to=None):
+        """Attendance rows of the original goal, optionally limited to a date range"""
+        attendances = GoalAttendance.objects.filter(goal=self.get_original_goal())
+        if date_from:
+            attendances = attendances.filter(date__gte=date_from)
+        if date_to:
+            attendances = attendances.filter(date__lte=date_to)
+        return attendances
+
+    def get_attendance_history(self, date_from=None, date_to=None):
+        """Get attendance history as {date: [usernames]} in date order"""
+        history = {}
+        attendances = self.get_attendances_between(date_from, date_to).order_by(
+            'date', 'created_at'
+        ).values_list('date', 'user__username')
+        for date, username in attendances:
+            history.setdefault(date.isoformat(), []).append(username)
+        return history
+
+    def get_attendance_calendars(self, date_from=None, date_to=None):
+        """Get (origin, {username: AttendanceCalendar}) built from the attendance rows.
+
+        Offsets count from `origin`, which is start_date unless someone checked in
+        before it, in which case it is the earliest check-in in the range.
+        """
         original_goal = self.get_original_goal()
-        return original_goal.attendance_dates
+        attendances = list(
+            original_goal.get_attendances_between(date_from, date_to).values_list('user__username', 'date')
+        )
+        origin = min([original_goal.start_date] + [date for _, date in attendances])
+        calendars = {}
+        for username, date in attendances:
+            calendars.setdefault(username, AttendanceCalendar()).add((date - origin).days)
+        return origin, calendars
 
     def save(self, *args, **kwargs):
-        # Update status before saving
-        self.update_status()
-        
-        # Update progress percentage and boat stages
-        self.progress_percentage = self.calculate_progress()
-        
-        # Save the model
-        super().save(*args, **kwargs)
-        
+        adding = self._state.adding
+
+        # Only redo the date math when an input to it changed
+        if adding or self.get_dirty_fields() & set(self.DERIVED_FROM):
+            # Keep the stored end date in sync with start_date and duration
+            if isinstance(self.start_date, str):
+                self.start_date = datetime.strptime(self.start_date, '%Y-%m-%d').date()
+            self.end_date = self.get_end_date()
+
+            # Update status before saving
+            self.update_status()
+
+            # Update progress percentage and boat stages
+            self.progress_percentage = self.calculate_progress()
+
+        # Limit the UPDATE to columns that actually changed
+        if not adding and not kwargs.get('force_insert'):
+            dirty = self.get_dirty_fields()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                if not dirty:
+                    return
+                kwargs['update_fields'] = dirty | {'updated_at'}
+            else:
+                kwargs['update_fields'] = set(update_fields) | (dirty & set(self.DERIVED_FIELDS))
+
+        # GoalSharing keeps partner memberships in sync, the owner's is kept here
+        owner_changed = not adding and 'user' in self.get_dirty_fields()
+
+        # Save the model, together with the owner's membership when it changes
+        if adding or owner_changed:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if adding:
+                    GoalMembership.add(self.pk, self.user_id, self.created_at)
+                else:
+                    GoalMembership.rebuild([self.pk])
+        else:
+            super().save(*args, **kwargs)
+
         # Update original values after save
-        self._original_status = self.status
+        self.snapshot_loaded_values()
+        goal_cache.invalidate_goal(self.pk)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'end_date'], name='goal_status_end_date_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='goal_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.progress_percentage}%"
@@ -309,7 +772,10 @@ class Goal(models.Model):
         today = timezone.now().date()
         
         # Calculate elapsed days (current day count)
-        elapsed_days = (today - start_date).days + 1  # +1 to include start date
+        if 'live_day_count' in self.__dict__:
+            elapsed_days = self.live_day_count
+        else:
+            elapsed_days = (today - start_date).days + 1  # +1 to include start date
         
         # Get total days based on duration
         total_days = self.get_duration_days()
@@ -336,6 +802,157 @@ class GoalAttendance(models.Model):
     class Meta:
         unique_together = ['goal', 'user', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['goal', 'date'], name='goal_attendance_goal_date_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.goal.title} - {self.user.username} - {self.date}"
\ No newline at end of file
+        return f"{self.goal.title} - {self.user.username} - {self.date}"
+
+class GoalAttendanceStats(models.Model):
+    goal = models.OneToOneField(
+        Goal,
+        on_delete=models.CASCADE,
+        related_name='attendance_stats'
+    )
+    total_days = models.IntegerField(default=0)  # Days with at least one check-in
+    perfect_days = models.IntegerField(default=0)  # Days every participant checked in
+    current_streak = models.IntegerField(default=0)  # As of last_check_in_date
+    longest_streak = models.IntegerField(default=0)
+    last_check_in_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STAT_FIELDS = ['total_days', 'perfect_days', 'current_streak', 'longest_streak', 'last_check_in_date']
+
+    def __str__(self):
+        return f"{self.goal_id} - {self.total_days} days"
+
+    def get_current_streak(self, today=None):
+        """Streak that is still alive today, i.e. last check-in was today or yesterday"""
+        today = today or timezone.now().date()
+        if self.last_check_in_date is None or self.last_check_in_date < today - timedelta(days=1):
+            return 0
+        return self.current_streak
+
+    def apply_check_in(self, date, attendees, total_users):
+        """Fold one new check-in on `date` into the counters.
+
+        `attendees` is the number of check-ins on that date including this one.
+        """
+        if self.last_check_in_date != date:
+            self.total_days += 1
+            if self.last_check_in_date == date - timedelta(days=1):
+                self.current_streak += 1
+            else:
+                self.current_streak = 1
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+            self.last_check_in_date = date
+        if attendees == total_users:
+            self.perfect_days += 1
+
+    @classmethod
+    def record_check_ins(cls, total_users, date):
+        """Update stats after new check-ins on `date`.
+
+        `total_users` maps each goal id that just got a check-in to its participant count.
+        Rows are locked so concurrent partners each see the other's committed check-in.
+        """
+        goal_ids = list(total_users)
+        cls.objects.bulk_create([cls(goal_id=goal_id) for goal_id in goal_ids], ignore_conflicts=True)
+        stats = list(cls.objects.select_for_update().filter(goal_id__in=goal_ids))
+        attendees = dict(
+            GoalAttendance.objects.filter(goal_id__in=goal_ids, date=date)
+            .values('goal_id')
+            .annotate(count=models.Count('id'))
+            .values_list('goal_id', 'count')
+        )
+        now = timezone.now()
+        for stat in stats:
+            stat.apply_check_in(date, attendees.get(stat.goal_id, 0), total_users[stat.goal_id])
+            stat.updated_at = now
+        cls.objects.bulk_update(stats, cls.STAT_FIELDS + ['updated_at'])
+
+    @classmethod
+    def build(cls, goal_id, daily_counts, total_users):
+        """Build stats from scratch given {date: check-in count} for one goal"""
+        stats = cls(goal_id=goal_id)
+        for date in sorted(daily_counts):
+            stats.apply_check_in(date, daily_counts[date], total_users)
+        return stats
+
+
+class GoalMembership(models.Model):
+    """Who can see a goal: its owner and every partner with an accepted share.
+
+    Maintained by Goal.save() and GoalSharing.save()/delete() so visibility is
+    one lookup on the (user, goal) index instead of an OR across the goal and
+    sharing tables that then needs DISTINCT. The goal's created_at is copied
+    here so the newest-first goal list can be read off one membership index
+    rather than sorting every visible goal.
+    """
+    goal = models.ForeignKey(
+        Goal,
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='goal_memberships'
+    )
+    goal_created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'goal']
+        indexes = [
+            models.Index(
+                fields=['user', '-goal_created_at', '-goal'],
+                name='goal_membership_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.goal_id} - {self.user_id}"
+
+    @classmethod
+    def add(cls, goal_id, user_id, goal_created_at=None):
+        if goal_created_at is None:
+            goal_created_at = Goal.objects.filter(pk=goal_id).values_list('created_at', flat=True).get()
+        cls.objects.bulk_create(
+            [cls(goal_id=goal_id, user_id=user_id, goal_created_at=goal_created_at)],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def remove(cls, goal_id, user_id):
+        # The owner's row stays even if they also held a share of their own goal
+        cls.objects.filter(goal_id=goal_id, user_id=user_id).exclude(goal__user_id=user_id).delete()
+
+    @classmethod
+    def rebuild(cls, goal_ids):
+        """Recompute memberships of the given goals from their owners and accepted shares"""
+        GoalSharing = apps.get_model('goal_sharing', 'GoalSharing')
+        created = {}
+        pairs = set()
+        for goal_id, user_id, created_at in Goal.objects.filter(pk__in=goal_ids).values_list(
+            'id', 'user_id', 'created_at'
+        ):
+            created[goal_id] = created_at
+            pairs.add((goal_id, user_id))
+        pairs.update(
+            GoalSharing.objects.filter(goal_id__in=goal_ids, status='accepted')
+            .exclude(shared_to_user=None)
+            .values_list('goal_id', 'shared_to_user_id')
+        )
+
+        # Readers keep seeing the old rows until the new ones are committed
+        with transaction.atomic():
+            cls.objects.filter(goal_id__in=goal_ids).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(goal_id=goal_id, user_id=user_id, goal_created_at=created[goal_id])
+                    for goal_id, user_id in pairs
+                ],
+                ignore_conflicts=True
+            )
+        return len(pairs)
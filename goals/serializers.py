@@ -1,6 +1,6 @@
 from rest_framework import serializers
+from . import cache as goal_cache
 from .models import Goal, GoalAttendance
-from django.utils import timezone
 
 class GoalAttendanceSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -10,6 +10,13 @@ class GoalAttendanceSerializer(serializers.ModelSerializer):
         fields = ['id', 'goal', 'user', 'username', 'date', 'created_at']
         read_only_fields = ['created_at']
 
+class CachedGoalListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        goals = list(data.all() if hasattr(data, 'all') else data)
+        if not all(goal.has_live_progress() for goal in goals):
+            return [self.child.build_representation(goal) for goal in goals]
+        return goal_cache.get_or_build(goals, self.child.build_representation)
+
 class GoalSerializer(serializers.ModelSerializer):
     current_stage_display = serializers.CharField(source='get_current_stage_display', read_only=True)
     next_stage_display = serializers.CharField(source='get_next_stage_display', read_only=True)
@@ -20,11 +27,11 @@ class GoalSerializer(serializers.ModelSerializer):
     current_boat_image = serializers.SerializerMethodField()
     next_boat_image = serializers.SerializerMethodField()
     progress_to_next = serializers.IntegerField(source='progress_to_next_stage', read_only=True)
-    end_date = serializers.SerializerMethodField()
     day_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Goal
+        list_serializer_class = CachedGoalListSerializer
         fields = [
             'id', 
             'user', 
@@ -64,6 +71,16 @@ class GoalSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
 
+    def to_representation(self, instance):
+        # Cached payloads carry live status and progress, so goals with only
+        # stored values must not fill the cache that list and retrieve read
+        if not instance.has_live_progress():
+            return self.build_representation(instance)
+        return goal_cache.get_or_build([instance], self.build_representation)[0]
+
+    def build_representation(self, instance):
+        return super().to_representation(instance)
+
     def get_current_boat_image(self, obj):
         return f'/static/images/boats/{obj.current_stage}.png'
 
@@ -71,13 +88,11 @@ class GoalSerializer(serializers.ModelSerializer):
         return f'/static/images/boats/{obj.next_stage}.png'
 
     def get_today_attendees(self, obj):
-        original_goal = obj.get_original_goal()
-        today = timezone.now().date().isoformat()
-        return original_goal.attendance_dates.get(today, [])
+        return obj.get_today_attendees()
 
     def get_shared_with(self, obj):
         original_goal = obj.get_original_goal()
-        sharing = original_goal.shares.filter(status='accepted').first()
+        sharing = original_goal.get_accepted_share()
         if sharing:
             return {
                 'user_id': sharing.shared_to_user.id,
@@ -89,9 +104,5 @@ class GoalSerializer(serializers.ModelSerializer):
         original_goal = obj.get_original_goal()
         return original_goal.id
 
-    def get_end_date(self, obj):
-        """Get the calculated end date"""
-        return obj.get_end_date()
-
     def get_day_count(self, obj):
         return obj.get_day_count()
\ No newline at end of file
@@ -1,3 +1,795 @@
-from django.test import TestCase
+import io
+import re
+import threading
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from goal_sharing.models import GoalSharing
+from harumada import db as db_stats
+from harumada.routers import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from users.models import User
+from . import cache as goal_cache
+from .models import Goal, GoalAttendance, GoalAttendanceStats, GoalMembership
+from .views import GoalViewSet
+
+
+class GoalListQueryCountTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def create_goals(self, count):
+        for index in range(count):
+            partner = User.objects.create_user(
+                f'partner{Goal.objects.count()}@example.com',
+                f'partner{Goal.objects.count()}',
+                'password'
+            )
+            goal = Goal.objects.create(
+                user=self.owner,
+                title=f'Goal {index}',
+                duration='month',
+                start_date=timezone.now().date() - timedelta(days=index)
+            )
+            GoalAttendance.objects.create(goal=goal, user=self.owner, date=timezone.now().date())
+            if index % 2 == 0:
+                GoalSharing.objects.create(
+                    goal=goal,
+                    shared_by_user=self.owner,
+                    shared_to_user=partner,
+                    status='accepted'
+                )
+
+    def test_list_query_count_does_not_grow_with_goals(self):
+        self.create_goals(2)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/goals/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_goals(10)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/goals/')
+        goals = response.data['results']
+        self.assertEqual(len(goals), 12)
+        shared = [goal for goal in goals if goal['shared_with']]
+        self.assertEqual(len(shared), 6)
+        self.assertTrue(all(goal['today_attendees'] == ['owner'] for goal in goals))
+
+    def test_cursor_pages_cover_every_goal_once(self):
+        self.create_goals(12)
+        ids = []
+        url = '/api/goals/?page_size=5'
+        while url:
+            response = self.client.get(url)
+            ids.extend(goal['id'] for goal in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, list(Goal.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+
+class GoalSaveTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        Goal.objects.create(
+            user=owner,
+            title='Goal',
+            duration='month',
+            start_date=timezone.now().date()
+        )
+        self.goal = Goal.objects.get()
+
+    def test_unchanged_save_skips_write(self):
+        with self.assertNumQueries(0):
+            self.goal.save()
+
+    def test_save_updates_only_changed_columns(self):
+        self.goal.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            self.goal.save()
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn('"title"', sql)
+        self.assertNotIn('"progress_percentage"', sql)
+
+    def test_in_place_json_changes_are_saved(self):
+        today = timezone.now().date().isoformat()
+        self.goal.attendance_dates[today] = ['owner']
+        self.goal.save()
+        self.assertEqual(Goal.objects.get().attendance_dates, {today: ['owner']})
+
+        self.goal.attendance_dates[today].append('partner')
+        self.goal.save()
+        self.assertEqual(Goal.objects.get().attendance_dates, {today: ['owner', 'partner']})
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'goals': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'goals'},
+})
+class GoalCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.goal = Goal.objects.create(
+            user=self.owner,
+            title='Goal',
+            duration='month',
+            start_date=timezone.now().date()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/goals/{self.goal.id}/'
+
+    def test_retrieve_is_served_from_cache_until_attendance_changes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['today_attendance_status'], 'zero_person_done')
+
+        hits = goal_cache.stats['hits']
+        self.client.get(self.url)
+        self.assertEqual(goal_cache.stats['hits'], hits + 1)
+
+        self.client.post(f'{self.url}mark_attendance/')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['today_attendance_status'], 'completed')
+        self.assertEqual(response.data['attendance_count'], 1)
+
+    def test_renames_outside_the_api_invalidate_cached_goals(self):
+        self.client.post(f'{self.url}mark_attendance/')
+        self.assertEqual(self.client.get(self.url).data['today_attendees'], ['owner'])
+
+        # Saving without a rename keeps the cached payload
+        user = User.objects.get(pk=self.owner.pk)
+        user.save()
+        hits = goal_cache.stats['hits']
+        self.client.get(self.url)
+        self.assertEqual(goal_cache.stats['hits'], hits + 1)
+
+        # e.g. the admin, which bypasses UserUpdateSerializer
+        user.username = 'renamed'
+        user.save()
+        self.assertEqual(self.client.get(self.url).data['today_attendees'], ['renamed'])
+
+
+class GoalConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.goal = Goal.objects.create(
+            user=self.owner,
+            title='Goal',
+            duration='month',
+            start_date=timezone.now().date()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_unchanged_list_returns_not_modified(self):
+        response = self.client.get('/api/goals/')
+        etag = response.headers['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/goals/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(f'/api/goals/{self.goal.id}/mark_attendance/')
+        response = self.client.get('/api/goals/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_etag_on_attendance_history(self):
+        url = f'/api/goals/{self.goal.id}/attendance_history/'
+        etag = self.client.get(url).headers['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_deleting_a_goal_is_never_answered_with_not_modified(self):
+        other = Goal.objects.create(
+            user=self.owner, title='Other', duration='week', start_date=timezone.now().date()
+        )
+        response = self.client.get('/api/goals/')
+        # Max(updated_at) can't see deletes, so there is no Last-Modified to revalidate against
+        self.assertNotIn('Last-Modified', response.headers)
+        etag = response.headers['ETag']
+        since = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+        self.client.delete(f'/api/goals/{other.id}/')
+        response = self.client.get('/api/goals/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([goal['id'] for goal in response.data['results']], [self.goal.id])
+        response = self.client.get('/api/goals/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class BulkAttendanceTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.other = User.objects.create_user('other@example.com', 'other', 'password')
+        today = timezone.now().date()
+        self.unlimited = Goal.objects.create(
+            user=self.owner, title='Unlimited', duration='unlimited', start_date=today
+        )
+        self.month = Goal.objects.create(
+            user=self.owner, title='Month', duration='month', start_date=today
+        )
+        self.foreign = Goal.objects.create(
+            user=self.other, title='Foreign', duration='week', start_date=today
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_bulk_check_in_matches_single_check_in(self):
+        self.client.post(f'/api/goals/{self.month.id}/mark_attendance/')
+        ids = [self.unlimited.id, self.month.id, self.foreign.id]
+
+        # Savepoint, locking read plus two prefetches, insert, UPDATE,
+        # four for the stats rows, release
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                '/api/goals/mark_attendance_bulk/', {'goal_ids': ids}, format='json'
+            )
+
+        results = {result['goal_id']: result for result in response.data['results']}
+        self.assertTrue(results[self.unlimited.id]['created'])
+        self.assertEqual(results[self.unlimited.id]['attendance_status'], 'completed')
+        self.assertFalse(results[self.month.id]['created'])
+        self.assertIn('error', results[self.foreign.id])
+
+        self.unlimited.refresh_from_db()
+        self.month.refresh_from_db()
+        self.assertEqual(self.unlimited.attendance_count, 1)
+        self.assertEqual(self.unlimited.progress_percentage, self.unlimited.calculate_progress())
+        self.assertEqual(self.month.attendance_count, 1)
+        self.assertFalse(GoalAttendance.objects.filter(goal=self.foreign).exists())
+
+    def test_rejects_malformed_goal_ids(self):
+        for goal_ids in ([True], [str(self.month.id)], list(range(1, 102))):
+            response = self.client.post(
+                '/api/goals/mark_attendance_bulk/', {'goal_ids': goal_ids}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(GoalAttendance.objects.exists())
+
+
+class AttendanceStatsTests(TestCase):
+    def test_incremental_stats_match_rebuild(self):
+        owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        partner = User.objects.create_user('partner@example.com', 'partner', 'password')
+        today = timezone.now().date()
+        goal = Goal.objects.create(
+            user=owner, title='Goal', duration='unlimited', start_date=today - timedelta(days=10)
+        )
+        GoalSharing.objects.create(
+            goal=goal, shared_by_user=owner, shared_to_user=partner, status='accepted'
+        )
+
+        check_ins = [(9, owner), (8, owner), (8, partner), (7, partner), (4, owner), (3, owner), (3, partner)]
+        for days_ago, user in check_ins:
+            date = today - timedelta(days=days_ago)
+            GoalAttendance.objects.create(goal=goal, user=user, date=date)
+            GoalAttendanceStats.record_check_ins({goal.id: 2}, date)
+
+        incremental = GoalAttendanceStats.objects.values(*GoalAttendanceStats.STAT_FIELDS).get(goal=goal)
+        call_command('rebuild_attendance_stats', stdout=io.StringIO())
+        rebuilt = GoalAttendanceStats.objects.values(*GoalAttendanceStats.STAT_FIELDS).get(goal=goal)
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(rebuilt, {
+            'total_days': 5,
+            'perfect_days': 2,
+            'current_streak': 2,
+            'longest_streak': 3,
+            'last_check_in_date': today - timedelta(days=3),
+        })
+
+
+class AttendanceHistoryTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.today = timezone.now().date()
+        self.start = self.today - timedelta(days=10)
+        self.goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='unlimited', start_date=self.start
+        )
+        for offset in (0, 1, 2, 5, 9):
+            GoalAttendance.objects.create(
+                goal=self.goal, user=self.owner, date=self.start + timedelta(days=offset)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/goals/{self.goal.id}/attendance_history/'
+
+    def test_date_range_limits_history(self):
+        response = self.client.get(self.url, {
+            'from': (self.start + timedelta(days=1)).isoformat(),
+            'to': (self.start + timedelta(days=5)).isoformat(),
+        })
+        self.assertEqual(list(response.data['history']), [
+            (self.start + timedelta(days=offset)).isoformat() for offset in (1, 2, 5)
+        ])
+
+    def test_compact_encodings(self):
+        response = self.client.get(self.url, {'encoding': 'runs'})
+        self.assertEqual(response.data['history'], {'owner': [[0, 3], [5, 1], [9, 1]]})
+
+        response = self.client.get(self.url, {'encoding': 'bitmap'})
+        # Bits 0, 1, 2, 5 and 9 set: 0b00100111, 0b00000010
+        self.assertEqual(response.data['history'], {'owner': 'JwI='})
+
+        response = self.client.get(self.url, {'encoding': 'runs', 'from': self.start + timedelta(days=2)})
+        self.assertEqual(response.data['history'], {'owner': [[2, 1], [5, 1], [9, 1]]})
+
+    def test_check_in_before_start_keeps_encodings_in_sync(self):
+        goal = Goal.objects.create(
+            user=self.owner, title='Later', duration='month', start_date=self.today + timedelta(days=3)
+        )
+        self.client.post(f'/api/goals/{goal.id}/mark_attendance/')
+        url = f'/api/goals/{goal.id}/attendance_history/'
+
+        response = self.client.get(url)
+        self.assertEqual(list(response.data['history']), [self.today.isoformat()])
+
+        response = self.client.get(url, {'encoding': 'runs'})
+        self.assertEqual(response.data['origin'], self.today)
+        self.assertEqual(response.data['history'], {'owner': [[0, 1]]})
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get(self.url, {'from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class GoalCommandTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.today = timezone.now().date()
+
+    def test_status_sweep_matches_save(self):
+        goals = []
+        for duration, _ in Goal.DURATION_CHOICES:
+            for days_ago in (-3, 0, 1, 6, 7, 15, 29, 30, 45, 89, 90, 179, 200, 364, 365, 400):
+                for attendance_count in (0, 6, 17, 30, 44):
+                    goal = Goal(
+                        user=self.owner,
+                        title='Goal',
+                        duration=duration,
+                        start_date=self.today - timedelta(days=days_ago),
+                        attendance_count=attendance_count
+                    )
+                    # Stored as created, before any sweep
+                    goal.end_date = goal.get_end_date()
+                    goals.append(goal)
+        Goal.objects.bulk_create(goals)
+
+        def sweep(**options):
+            out = io.StringIO()
+            call_command('update_goal_status', chunk_size=100, stdout=out, **options)
+            counts = re.search(r'(\d+) goals to in_progress, (\d+) goals to done and (\d+) progress rows', out.getvalue())
+            return counts.groups()
+
+        # The dry run reports exactly what the sweep then writes
+        expected_counts = sweep(dry_run=True)
+        self.assertEqual(sweep(), expected_counts)
+
+        for goal in Goal.objects.all():
+            stored = (goal.status, goal.progress_percentage, goal.current_stage, goal.next_stage)
+            goal.update_status()
+            goal.progress_percentage = goal.calculate_progress()
+            expected = (goal.status, goal.progress_percentage, goal.current_stage, goal.next_stage)
+            self.assertEqual(stored, expected, (goal.duration, goal.start_date))
+
+        # A rerun on the same day rewrites nothing, and the dry run says so
+        updated_at = dict(Goal.objects.values_list('id', 'updated_at'))
+        self.assertEqual(sweep(dry_run=True), ('0', '0', '0'))
+        out = io.StringIO()
+        call_command('update_goal_status', stdout=out)
+        self.assertIn('Updated 0 goals to in_progress, 0 goals to done and 0 progress rows', out.getvalue())
+        self.assertEqual(dict(Goal.objects.values_list('id', 'updated_at')), updated_at)
+
+    def test_backfill_end_dates(self):
+        goals = [
+            Goal(user=self.owner, title='Goal', duration=duration, start_date=self.today)
+            for duration, _ in Goal.DURATION_CHOICES
+        ]
+        Goal.objects.bulk_create(goals)
+        Goal.objects.filter(duration='unlimited').update(end_date=self.today)
+
+        call_command('backfill_goal_end_dates', chunk_size=2, stdout=io.StringIO())
+
+        for goal in Goal.objects.all():
+            self.assertEqual(goal.end_date, goal.get_end_date(), goal.duration)
+
+    def test_migrate_attendance_dates(self):
+        goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='month', start_date=self.today,
+            attendance_dates={self.today.isoformat(): ['owner', 'ghost']}
+        )
+
+        out = io.StringIO()
+        call_command('migrate_attendance_dates', stdout=out)
+        call_command('migrate_attendance_dates', stdout=io.StringIO())
+
+        self.assertIn('1 skipped for unknown users', out.getvalue())
+        self.assertEqual(
+            list(GoalAttendance.objects.filter(goal=goal).values_list('user_id', 'date')),
+            [(self.owner.id, self.today)]
+        )
+
+
+class RecomputeProgressTests(TestCase):
+    def test_batch_recompute_matches_calculate_progress(self):
+        owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        today = timezone.now().date()
+        goals = []
+        for duration, _ in Goal.DURATION_CHOICES:
+            for days_ago in (-3, 0, 1, 6, 7, 29, 45, 400):
+                for attendance_count in (0, 5, 6, 17, 30, 44):
+                    goals.append(Goal(
+                        user=owner,
+                        title='Goal',
+                        duration=duration,
+                        start_date=today - timedelta(days=days_ago),
+                        attendance_count=attendance_count,
+                        status='done' if days_ago == 45 else 'in_progress'
+                    ))
+        Goal.objects.bulk_create(goals)
+
+        Goal.objects.all().recompute_progress(chunk_size=50, today=today)
+
+        for goal in Goal.objects.all():
+            stored = (goal.progress_percentage, goal.current_stage, goal.next_stage)
+            self.assertEqual(stored, (goal.calculate_progress(), goal.current_stage, goal.next_stage))
+        self.assertEqual(Goal.objects.all().recompute_progress(today=today), 0)
+
+
+class LiveProgressTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.today = timezone.now().date()
+
+    def test_annotations_match_save(self):
+        goals = []
+        for duration, _ in Goal.DURATION_CHOICES:
+            for days_ago in (-3, 0, 1, 6, 7, 15, 29, 30, 45, 89, 90, 179, 200, 364, 365, 400):
+                for attendance_count in (0, 5, 6, 17, 29, 30, 44):
+                    goals.append(Goal(
+                        user=self.owner,
+                        title='Goal',
+                        duration=duration,
+                        start_date=self.today - timedelta(days=days_ago),
+                        attendance_count=attendance_count
+                    ))
+        Goal.objects.bulk_create(goals)
+
+        for goal in Goal.objects.with_live_progress():
+            live = {field: getattr(goal, field) for field in Goal.LIVE_FIELDS}
+            goal.end_date = goal.get_end_date()
+            goal.update_status()
+            goal.progress_percentage = goal.calculate_progress()
+            self.assertEqual(live, {field: getattr(goal, field) for field in Goal.LIVE_FIELDS}, goal.start_date)
+            self.assertEqual(goal.live_day_count, (self.today - goal.start_date).days + 1)
+
+    def test_retrieve_shows_fresh_values_without_writing(self):
+        goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='week', start_date=self.today - timedelta(days=3)
+        )
+        # As if the sweeper hadn't run since the goal was created
+        Goal.objects.filter(pk=goal.pk).update(
+            status='pending', progress_percentage=0, current_stage='boat1', next_stage='boat2'
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(f'/api/goals/{goal.id}/').data
+        writes = [query['sql'] for query in queries if not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertEqual(Goal.objects.get(pk=goal.pk).status, 'pending')
+
+        self.assertEqual(data['status'], 'in_progress')
+        self.assertEqual(data['progress_percentage'], 43)
+        self.assertEqual((data['current_stage'], data['next_stage']), ('boat3', 'boat4'))
+        self.assertEqual(data['day_count']['current_day'], 4)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'goals': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'live-goals'},
+    })
+    def test_every_goal_payload_is_live(self):
+        partner = User.objects.create_user('partner@example.com', 'partner', 'password')
+        goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='week', start_date=self.today - timedelta(days=3)
+        )
+        invitation = GoalSharing.objects.create(goal=goal, shared_by_user=self.owner)
+        Goal.objects.filter(pk=goal.pk).update(
+            status='pending', progress_percentage=0, current_stage='boat1', next_stage='boat2'
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        def assert_live(data):
+            self.assertEqual(
+                (data['status'], data['progress_percentage'], data['current_stage']),
+                ('in_progress', 43, 'boat3')
+            )
+
+        # Each of these serializes the goal and may fill the shared payload cache
+        assert_live(client.get('/api/goal-sharing/').data['results'][0]['goal_details'])
+        assert_live(client.get(f'/api/goals/{goal.id}/').data)
+        assert_live(client.post(f'/api/goals/{goal.id}/increment_attendance/').data)
+        assert_live(client.get(f'/api/goals/{goal.id}/').data)
+
+        client.force_authenticate(partner)
+        response = client.post('/api/goals/', {'invitation_code': invitation.invitation_code}, format='json')
+        assert_live(response.data['goal'])
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    # No transaction is open here, so the router is free to pick the replica
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.owner = User(id=1, email='owner@example.com', username='owner')
+        self.other = User(id=2, email='other@example.com', username='other')
+
+    def route(self, method, user, write=False):
+        """Databases chosen for a read, an optional write and a read after it"""
+        chosen = []
+
+        def view(request):
+            chosen.append(self.router.db_for_read(Goal))
+            if write:
+                chosen.append(self.router.db_for_write(Goal))
+                chosen.append(self.router.db_for_read(Goal))
+            return None
+
+        token = RefreshToken.for_user(user).access_token
+        request = getattr(self.factory, method)('/api/goals/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        ReplicaRoutingMiddleware(view)(request)
+        return chosen
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.route('get', self.owner), ['replica'])
+        self.assertEqual(self.route('post', self.owner), ['default'])
+        self.assertEqual(self.router.db_for_read(Goal), 'default')
+
+    def test_reads_follow_own_writes_to_primary(self):
+        self.assertEqual(self.route('post', self.owner, write=True), ['default', 'default', 'default'])
+        self.assertEqual(self.route('get', self.owner), ['default'])
+        self.assertEqual(self.route('get', self.other), ['replica'])
+
+    async def test_async_requests_are_routed_without_a_thread_hop(self):
+        chosen = []
+
+        async def view(request):
+            chosen.append(await sync_to_async(self.router.db_for_read)(Goal))
+            chosen.append(await sync_to_async(self.router.db_for_write)(Goal))
+            return None
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        token = RefreshToken.for_user(self.owner).access_token
+        request = self.factory.get('/api/goals/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        await middleware(request)
+        self.assertEqual(chosen, ['replica', 'default'])
+        self.assertEqual(await sync_to_async(self.route)('get', self.owner), ['default'])
+
+
+class ConnectionStatsTests(TestCase):
+    def test_new_connections_are_timed(self):
+        connects = db_stats.get_stats()['default']['connects']
+
+        wrapper = connections.create_connection('default')
+        wrapper.ensure_connection()
+        wrapper.close()
+
+        stats = db_stats.get_stats()['default']
+        self.assertEqual(stats['connects'], connects + 1)
+        self.assertFalse(stats['pooled'])
+        self.assertGreaterEqual(stats['max_ms'], stats['last_ms'])
+
+    def test_stats_endpoint_is_admin_only(self):
+        user = User.objects.create_user('owner@example.com', 'owner', 'password')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get('/api/db-stats/').status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        self.assertIn('default', client.get('/api/db-stats/').data)
+
+
+@override_settings(ROOT_URLCONF='harumada.async_urls')
+class AsyncGoalViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='unlimited', start_date=timezone.now().date()
+        )
+        token = RefreshToken.for_user(self.owner).access_token
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self.async_client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    async def test_async_endpoints_match_sync_views(self):
+        response = await self.async_client.post(
+            f'/api/goals/{self.goal.id}/mark_attendance/', headers=self.auth
+        )
+        self.assertTrue(response.json()['created'])
+
+        for path in (
+            '/api/goals/',
+            f'/api/goals/{self.goal.id}/',
+            f'/api/goals/{self.goal.id}/attendance_history/?encoding=runs',
+        ):
+            response = await self.async_client.get(path, headers=self.auth)
+            expected = await sync_to_async(self.sync_client.get)(path)
+            self.assertEqual(response.json(), expected.json(), path)
+            self.assertEqual(response.headers['ETag'], expected.headers['ETag'], path)
+
+            not_modified = await self.async_client.get(
+                path, headers={**self.auth, 'If-None-Match': response.headers['ETag']}
+            )
+            self.assertEqual(not_modified.status_code, 304)
+
+    async def test_errors(self):
+        self.assertEqual((await AsyncClient().get('/api/goals/')).status_code, 401)
+        response = await self.async_client.get('/api/goals/0/', headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(
+            f'/api/goals/{self.goal.id}/attendance_history/?from=x', headers=self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class GoalMembershipTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.partner = User.objects.create_user('partner@example.com', 'partner', 'password')
+        self.goal = Goal.objects.create(
+            user=self.owner, title='Goal', duration='month', start_date=timezone.now().date()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner)
+
+    def members(self):
+        return set(GoalMembership.objects.filter(goal=self.goal).values_list('user_id', flat=True))
+
+    def test_memberships_follow_accepted_shares(self):
+        self.assertEqual(self.members(), {self.owner.id})
+
+        # Pending invitations leave memberships alone
+        with CaptureQueriesContext(connection) as queries:
+            sharing = GoalSharing.objects.create(
+                goal=self.goal, shared_by_user=self.owner, shared_to_user=self.partner
+            )
+        self.assertFalse([query for query in queries if 'goalmembership' in query['sql']])
+        self.assertEqual(self.members(), {self.owner.id})
+        self.assertEqual(self.client.get(f'/api/goals/{self.goal.id}/').status_code, 404)
+
+        sharing = GoalSharing.objects.get(pk=sharing.pk)
+        sharing.status = 'accepted'
+        sharing.save()
+        # A second save of the acceptance, e.g. from a concurrent request, is harmless
+        GoalMembership.add(self.goal.id, self.partner.id)
+        self.assertEqual(self.members(), {self.owner.id, self.partner.id})
+        self.assertEqual(self.client.get(f'/api/goals/{self.goal.id}/').status_code, 200)
+
+        GoalSharing.objects.get(pk=sharing.pk).delete()
+        self.assertEqual(self.members(), {self.owner.id})
+
+        GoalMembership.objects.all().delete()
+        call_command('rebuild_goal_memberships', stdout=io.StringIO())
+        self.assertEqual(self.members(), {self.owner.id})
+
+    def test_visibility_lookup_reads_only_the_membership_index(self):
+        queryset = GoalMembership.objects.filter(user=self.owner).values('goal_id')
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise be scanned sequentially
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            self.assertIn('Index Only Scan', queryset.explain())
+        else:
+            self.assertIn('USING COVERING INDEX', queryset.explain())
+
+        plan = Goal.objects.filter(memberships__user=self.owner).explain()
+        self.assertNotIn('goal_sharing', plan)
+        self.assertNotIn('DISTINCT', plan.upper())
+
+    def test_list_pages_off_the_membership_index(self):
+        shared = Goal.objects.create(
+            user=self.partner, title='Shared', duration='month', start_date=timezone.now().date()
+        )
+        GoalSharing.objects.create(
+            goal=shared, shared_by_user=self.partner, shared_to_user=self.owner, status='accepted'
+        )
+        self.client.force_authenticate(self.owner)
+        ids = [goal['id'] for goal in self.client.get('/api/goals/').data['results']]
+        self.assertEqual(ids, [shared.id, self.goal.id])
+        first = self.client.get('/api/goals/?page_size=1').data
+        second = self.client.get(first['next']).data
+        self.assertEqual([goal['id'] for goal in second['results']], [self.goal.id])
+
+        # The list's own queryset, ordered and sliced the way the paginator does
+        view = GoalViewSet(action='list', format_kwarg=None, request=RequestFactory().get('/api/goals/'))
+        view.request.user = self.owner
+        paginator = view.paginator
+        queryset = view.get_queryset().order_by(*paginator.ordering)[:paginator.page_size + 1]
+        postgresql = connection.vendor == 'postgresql'
+        if postgresql:
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn('goal_membership_created_idx', plan)
+        # No sort step: rows come back in index order
+        self.assertNotIn('Sort' if postgresql else 'TEMP B-TREE', plan)
+
+
+class AttendanceConcurrencyTests(TransactionTestCase):
+    def test_parallel_check_ins_are_not_lost(self):
+        owner = User.objects.create_user('owner@example.com', 'owner', 'password')
+        goal = Goal.objects.create(
+            user=owner,
+            title='Unlimited goal',
+            duration='unlimited',
+            start_date=timezone.now().date()
+        )
+        workers = 8
+        users = [owner]
+        for index in range(1, workers):
+            partner = User.objects.create_user(f'partner{index}@example.com', f'partner{index}', 'password')
+            GoalSharing.objects.create(
+                goal=goal, shared_by_user=owner, shared_to_user=partner, status='accepted'
+            )
+            users.append(partner)
+        barrier = threading.Barrier(workers)
+        errors = []
+
+        def check_in(user):
+            instance = Goal.objects.get(pk=goal.pk)
+            barrier.wait()
+            # SQLite's shared-cache test database reports lock contention
+            # instead of waiting for the row like Postgres does, so retry
+            try:
+                for attempt in range(100):
+                    try:
+                        instance.mark_attendance(user)
+                        break
+                    except OperationalError:
+                        if attempt == 99:
+                            raise
+                        time.sleep(0.01)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=check_in, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        self.assertFalse([thread for thread in threads if thread.is_alive()])
+        self.assertEqual(errors, [])
+
+        goal.refresh_from_db()
+        self.assertEqual(goal.attendance_count, workers)
+        self.assertEqual(goal.progress_percentage, goal.calculate_progress())
+        self.assertEqual(goal.current_stage, 'boat2')
+        self.assertEqual(GoalAttendance.objects.filter(goal=goal).count(), workers)
+        self.assertEqual(GoalAttendanceStats.objects.get(goal=goal).total_days, 1)
+        self.assertEqual(
+            sorted(goal.get_attendance_history()[timezone.now().date().isoformat()]),
+            sorted(user.username for user in users)
+        )
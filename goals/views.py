@@ -1,26 +1,57 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db import models
-from .models import Goal
+from . import cache as goal_cache
+from .attendance import bitmap_to_base64, encode_runs
+from .models import Goal, GoalAttendanceStats
 from .serializers import GoalSerializer
 from goal_sharing.models import GoalSharing
 from rest_framework.decorators import action
-from django.db.models import Q
+from django.db.models import Count, F, Max, Q
+from harumada.conditional import ConditionalGetMixin
+from harumada.pagination import MembershipCursorPagination
 from datetime import datetime, timezone
 
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GoalSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MembershipCursorPagination
     http_method_names = ['get', 'post', 'delete']
+    conditional_actions = ('list', 'retrieve', 'attendance_history')
+    # Upper bound on goal_ids accepted by mark_attendance_bulk
+    max_bulk_goals = 100
 
-    def get_queryset(self):
+    def get_visible_queryset(self):
         """Get goals that user owns or has shared access to"""
-        user = self.request.user
-        return Goal.objects.filter(
-            Q(user=user) |
-            Q(shares__shared_to_user=user, shares__status='accepted')
-        ).distinct()
+        # One row per (user, goal), so the join needs no DISTINCT
+        return Goal.objects.filter(memberships__user=self.request.user)
+
+    def get_queryset(self):
+        # Sort keys come from the visibility join itself, so the list pages
+        # straight off goal_membership_created_idx instead of sorting
+        return self.get_visible_queryset().annotate(
+            membership_created_at=F('memberships__goal_created_at'),
+            membership_goal_id=F('memberships__goal'),
+        ).with_sharing().with_today_attendance().with_live_progress()
+
+    def get_conditional_aggregates(self):
+        """Everything a goal payload is built from bumps one of these"""
+        return {
+            'count': Count('id', distinct=True),
+            'goal_updated': Max('updated_at'),
+            # Counts catch deletes, which no Max() sees
+            'share_count': Count('shares', distinct=True),
+            'share_updated': Max('shares__updated_at'),
+            'owner_updated': Max('user__updated_at'),
+            'partner_updated': Max('shares__shared_to_user__updated_at'),
+        }
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self.conditional_response(request)
+        if not_modified:
+            return not_modified
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Automatically set the user when creating a goal"""
@@ -47,15 +78,21 @@ class GoalViewSet(viewsets.ModelViewSet):
     def increment_attendance(self, request, pk=None):
         """Increment attendance count for a goal"""
         goal = self.get_object()
-        goal.attendance_count += 1
-        goal.save()  # This will recalculate progress
-        serializer = self.get_serializer(goal)
+        goal.increment_attendance()
+        # Reload so the payload shows live progress rather than the refreshed stored columns
+        serializer = self.get_serializer(self.get_queryset().get(pk=goal.pk))
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def update_all_statuses(self, request):
         """Force update status for all goals"""
-        goals = self.get_queryset()
+        today = datetime.now(timezone.utc).date()
+        # Load stored values; live ones would already show the new status
+        goals = Goal.objects.filter(
+            Q(status='pending', start_date__lte=today) |
+            Q(status__in=['pending', 'in_progress'], end_date__lte=today),
+            pk__in=self.get_visible_queryset().order_by().values('pk')
+        )
         updated = []
         
         for goal in goals:
@@ -76,13 +113,20 @@ class GoalViewSet(viewsets.ModelViewSet):
         })
 
     def retrieve(self, request, *args, **kwargs):
-        """Get single goal with updated status"""
-        instance = self.get_object()
-        instance.update_status()
-        if instance.is_dirty():  # Now this will work
-            instance.save()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        """Get single goal with current status.
+
+        Status and progress come from with_live_progress(), so reads never
+        write; the update_goal_status sweeper keeps the stored columns current.
+        """
+        not_modified = self.conditional_response(request)
+        if not_modified:
+            return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Hit/miss counters of the serialized goal cache in this process"""
+        return Response(goal_cache.get_stats())
 
     @action(detail=True, methods=['post'])
     def mark_attendance(self, request, pk=None):
@@ -104,39 +148,124 @@ class GoalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+    @action(detail=False, methods=['post'])
+    def mark_attendance_bulk(self, request):
+        """Mark attendance for today on several goals at once"""
+        goal_ids = request.data.get('goal_ids')
+        # bool is an int subclass, so exclude it explicitly
+        if not isinstance(goal_ids, list) or \
+           not all(isinstance(goal_id, int) and not isinstance(goal_id, bool) for goal_id in goal_ids):
+            return Response(
+                {'error': 'goal_ids must be a list of goal ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(goal_ids) > self.max_bulk_goals:
+            return Response(
+                {'error': f'At most {self.max_bulk_goals} goal ids can be marked at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        marked = self.get_visible_queryset().filter(id__in=goal_ids).mark_attendance(request.user)
+
+        results = []
+        for goal_id in goal_ids:
+            if goal_id not in marked:
+                results.append({
+                    'goal_id': goal_id,
+                    'error': "You don't have permission to mark attendance for this goal"
+                })
+                continue
+            created, attendance_status = marked[goal_id]
+            results.append({
+                'goal_id': goal_id,
+                'message': 'Attendance marked successfully' if created else 'Already marked attendance for today',
+                'attendance_status': attendance_status,
+                'created': created,
+                'original_goal_id': goal_id
+            })
+
+        return Response({'results': results})
+
     @action(detail=True, methods=['get'])
     def attendance_history(self, request, pk=None):
         """Get attendance history with day counts"""
+        not_modified = self.conditional_response(request)
+        if not_modified:
+            return not_modified
         goal = self.get_object()
-        original_goal = goal.get_original_goal()
-        attendance_dates = original_goal.attendance_dates or {}
+        try:
+            data = self.build_attendance_history(goal.get_original_goal())
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+    def build_attendance_history(self, original_goal):
+        """Attendance history payload for the request's query parameters.
+
+        Raises ValueError for invalid parameters.
+        """
+        request = self.request
+        date_from = self.parse_date_param(request, 'from')
+        date_to = self.parse_date_param(request, 'to')
+
+        encoding = request.query_params.get('encoding', 'dates')
+        if encoding not in ('dates', 'runs', 'bitmap'):
+            raise ValueError('encoding must be one of: dates, runs, bitmap')
 
         # Get sharing info
-        sharing = original_goal.shares.filter(status='accepted').first()
-        total_users = 2 if sharing else 1
-
-        # Calculate statistics
-        history = {}
-        total_days = len(attendance_dates)
-        perfect_days = 0
-
-        for date_str, attendees in attendance_dates.items():
-            history[date_str] = {
-                'attendees': attendees,
-                'count': len(attendees),
-                'total_users': total_users,
-                'is_perfect': len(attendees) == total_users
-            }
-            if len(attendees) == total_users:
-                perfect_days += 1
+        total_users = original_goal.get_total_users()
 
-        return Response({
+        # Statistics are maintained on every check-in
+        stats = GoalAttendanceStats.objects.filter(goal=original_goal).first() or \
+            GoalAttendanceStats(goal=original_goal)
+
+        origin = original_goal.start_date
+        if encoding == 'dates':
+            history = {}
+            for date_str, attendees in original_goal.get_attendance_history(date_from, date_to).items():
+                history[date_str] = {
+                    'attendees': attendees,
+                    'count': len(attendees),
+                    'total_users': total_users,
+                    'is_perfect': len(attendees) == total_users
+                }
+        else:
+            # Per-user day offsets from `origin` instead of ISO date keys
+            origin, calendars = original_goal.get_attendance_calendars(date_from, date_to)
+            if encoding == 'runs':
+                history = {
+                    username: encode_runs(calendar.offsets())
+                    for username, calendar in calendars.items()
+                }
+            else:
+                history = {
+                    username: bitmap_to_base64(calendar.to_bytes())
+                    for username, calendar in calendars.items()
+                }
+
+        return {
             'original_goal_id': original_goal.id,
-            'total_days': total_days,
-            'perfect_days': perfect_days,
+            'total_days': stats.total_days,
+            'perfect_days': stats.perfect_days,
+            'current_streak': stats.get_current_streak(),
+            'longest_streak': stats.longest_streak,
+            'last_check_in_date': stats.last_check_in_date,
             'total_users': total_users,
+            'start_date': original_goal.start_date,
+            'origin': origin,
+            'encoding': encoding,
             'history': history
-        })
+        }
+
+    def parse_date_param(self, request, name):
+        """Parse an optional YYYY-MM-DD query parameter"""
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format")
 
     @action(detail=False, methods=['post'])
     def join_shared_goal(self, request):
@@ -151,8 +280,10 @@ class GoalViewSet(viewsets.ModelViewSet):
                 status='pending'
             )
             
-            # Get the original goal data
-            goal = sharing.goal
+            # Get the original goal data, with live values like list and retrieve
+            goal = Goal.objects.with_sharing().with_today_attendance().with_live_progress().get(
+                pk=sharing.goal_id
+            )
             goal_data = self.get_serializer(goal).data
             
             if action == 'check':
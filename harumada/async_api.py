@@ -0,0 +1,57 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from users.authentication import CachedJWTAuthentication
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """JSON response encoded the way DRF's JSONRenderer encodes it"""
+    return JsonResponse(data, status=status, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+def async_api_view(methods, fallback=None):
+    """Serve `methods` from an async handler that gets an authenticated DRF Request.
+
+    Other methods are passed to the sync `fallback` view in a worker thread.
+    Authentication runs off the event loop since it may read the users table.
+    """
+    def decorator(handler):
+        @csrf_exempt
+        @functools.wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in methods:
+                if fallback is None:
+                    return json_response(
+                        {'detail': f'Method "{request.method}" not allowed.'},
+                        status=status.HTTP_405_METHOD_NOT_ALLOWED
+                    )
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+
+            authenticator = CachedJWTAuthentication()
+            drf_request = Request(request, parsers=[JSONParser()], authenticators=[authenticator])
+            try:
+                user = await sync_to_async(lambda: drf_request.user)()
+            except exceptions.AuthenticationFailed as exc:
+                return unauthenticated(drf_request, authenticator, exc.detail)
+            if not user.is_authenticated:
+                return unauthenticated(
+                    drf_request, authenticator, exceptions.NotAuthenticated.default_detail
+                )
+            return await handler(drf_request, *args, **kwargs)
+        return view
+    return decorator
+
+
+def unauthenticated(request, authenticator, detail):
+    return json_response(
+        {'detail': detail},
+        status=status.HTTP_401_UNAUTHORIZED,
+        headers={'WWW-Authenticate': authenticator.authenticate_header(request)}
+    )
@@ -0,0 +1,19 @@
+"""
+URL configuration for ASGI deployments.
+
+The hot read endpoints and check-ins are served by native async views; their
+remaining methods and every other route fall through to harumada.urls.
+"""
+from django.urls import path
+
+from goals import async_views as goal_views
+from users import async_views as user_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/goals/', goal_views.goal_list),
+    path('api/goals/<int:pk>/', goal_views.goal_detail),
+    path('api/goals/<int:pk>/mark_attendance/', goal_views.goal_mark_attendance),
+    path('api/goals/<int:pk>/attendance_history/', goal_views.goal_attendance_history),
+    path('api/users/me/', user_views.me),
+] + sync_urlpatterns
@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+class ConditionalGetMixin:
+    """ETag validators for read actions, computed from one aggregate query.
+
+    Viewsets list the actions to cover in `conditional_actions` and return
+    Max()/Count() expressions over `get_conditional_queryset()` from
+    `get_conditional_aggregates()`. Handlers call `conditional_response()`
+    first and return its result when it is not None.
+
+    No Last-Modified is sent: a Max() of updated_at doesn't move when a row
+    is deleted, so If-Modified-Since would keep answering 304 for a list that
+    lost a goal or share. The ETag also covers counts and catches that.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_visible_queryset(self):
+        """Rows the user may see, without get_queryset()'s loading and annotation setup"""
+        return self.get_queryset()
+
+    def get_conditional_queryset(self):
+        queryset = self.get_visible_queryset()
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is not None:
+            queryset = queryset.filter(**{self.lookup_field: lookup})
+        # Aggregate over a plain id subquery so visibility joins and DISTINCT
+        # don't leak into the aggregated relations
+        return queryset.model.objects.filter(pk__in=queryset.order_by().values('pk'))
+
+    def get_conditional_aggregates(self):
+        raise NotImplementedError
+
+    def get_etag(self):
+        try:
+            values = self.get_conditional_queryset().aggregate(**self.get_conditional_aggregates())
+        except (TypeError, ValueError):
+            # Malformed lookup values are left for get_object() to 404
+            return None
+        return self.etag_from(values)
+
+    async def aget_etag(self):
+        try:
+            values = await self.get_conditional_queryset().aaggregate(**self.get_conditional_aggregates())
+        except (TypeError, ValueError):
+            return None
+        return self.etag_from(values)
+
+    def etag_from(self, values):
+        """ETag for aggregated values"""
+        if not any(values.values()):
+            return None
+
+        # Day-relative fields such as day_count change at midnight
+        midnight = timezone.make_aware(datetime.combine(timezone.now().date(), time.min))
+        fingerprint = '|'.join(
+            [self.request.get_full_path(), str(self.request.user.pk), midnight.date().isoformat()] +
+            [f'{name}={values[name]}' for name in sorted(values)]
+        )
+        return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+    def conditional_response(self, request):
+        """Return a 304 when the client's validators still match, otherwise None"""
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return None
+        return self.conditional_response_for(request, self.get_etag())
+
+    async def aconditional_response(self, request):
+        """conditional_response() for async views"""
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return None
+        return self.conditional_response_for(request, await self.aget_etag())
+
+    def conditional_response_for(self, request, etag):
+        if etag is None:
+            return None
+        self.conditional_headers = {'ETag': etag}
+        return get_conditional_response(request._request, etag=etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, 'conditional_headers', None)
+        if headers and response.status_code in (200, 304):
+            for header, value in headers.items():
+                response.headers.setdefault(header, value)
+        return response
@@ -0,0 +1,39 @@
+import time
+
+from django.db import connections
+
+# Per-process connection timings by database alias, see get_stats()
+stats = {}
+
+
+class ConnectionTimingMixin:
+    """Time every new connection, which is a checkout wait when a pool is configured"""
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_connect(self.alias, (time.perf_counter() - started) * 1000)
+        return connection
+
+
+def record_connect(alias, elapsed_ms):
+    alias_stats = stats.setdefault(alias, {'connects': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+    alias_stats['connects'] += 1
+    alias_stats['total_ms'] += elapsed_ms
+    alias_stats['max_ms'] = max(alias_stats['max_ms'], elapsed_ms)
+    alias_stats['last_ms'] = elapsed_ms
+
+
+def get_stats():
+    """Connect latency per alias, plus psycopg pool counters where a pool is in use"""
+    result = {}
+    for alias in connections:
+        alias_stats = dict(stats.get(alias, {'connects': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}))
+        alias_stats['avg_ms'] = alias_stats['total_ms'] / alias_stats['connects'] if alias_stats['connects'] else 0.0
+        pool = getattr(connections[alias], 'pool', None)
+        alias_stats['pooled'] = pool is not None
+        if pool is not None:
+            # Includes requests_waiting, requests_wait_ms and requests_errors (timeouts)
+            alias_stats['pool'] = pool.get_stats()
+        result[alias] = alias_stats
+    return result
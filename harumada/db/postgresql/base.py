@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from harumada.db import ConnectionTimingMixin
+
+
+class DatabaseWrapper(ConnectionTimingMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset pagination over (created_at, id), newest first"""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class MembershipCursorPagination(CreatedAtCursorPagination):
+    """Newest first by the created_at copied onto the viewer's membership row
+
+    Querysets must annotate `membership_created_at` and `membership_goal_id`
+    from the same membership join that filters them, so the page is read off
+    that table's index. Ordering by the goal's own id would make the database
+    sort again.
+    """
+    ordering = ('-membership_created_at', '-membership_goal_id')
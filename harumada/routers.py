@@ -0,0 +1,133 @@
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the request being handled, None outside requests
+request_routing = contextvars.ContextVar('request_routing', default=None)
+
+
+def pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def request_user_id(request):
+    """User id from a valid bearer token, without loading the user"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+class PrimaryReplicaRouter:
+    """Route reads of safe-method requests to the replica and everything else to the primary.
+
+    Reads stay on the primary outside requests, inside transactions and
+    after the current request has written anything.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = request_routing.get()
+        if state is None or not state['replica'] or state['wrote']:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = request_routing.get()
+        if state is not None:
+            state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Let PrimaryReplicaRouter see the request method, and pin users who wrote to the primary.
+
+    After a request that wrote, that user's reads go to the primary for
+    REPLICA_PIN_SECONDS so they see their own changes despite replica lag.
+    The pin lives in the default cache, which must be shared between
+    processes; settings only install this with REDIS_URL.
+    Runs natively under both WSGI and ASGI, so async views stay on the loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        user_id = request_user_id(request)
+        pinned = user_id is not None and cache.get(pin_key(user_id)) is not None
+        state = self.routing_state(request, pinned)
+
+        token = request_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_routing.reset(token)
+
+        pin_user_id = self.pin_user_id(request, state, user_id)
+        if pin_user_id is not None:
+            cache.set(pin_key(pin_user_id), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        user_id = request_user_id(request)
+        pinned = user_id is not None and await cache.aget(pin_key(user_id)) is not None
+        state = self.routing_state(request, pinned)
+
+        # sync_to_async copies the context, so ORM calls in worker threads see
+        # this state, and the router's writes to it are seen here
+        token = request_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_routing.reset(token)
+
+        pin_user_id = self.pin_user_id(request, state, user_id)
+        if pin_user_id is not None:
+            await cache.aset(pin_key(pin_user_id), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def routing_state(self, request, pinned):
+        return {'replica': request.method in SAFE_METHODS and not pinned, 'wrote': False}
+
+    def pin_user_id(self, request, state, user_id):
+        """User to pin to the primary after this request, if it wrote"""
+        if not state['wrote']:
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return user_id
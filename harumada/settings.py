@@ -14,7 +14,9 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
-load_dotenv()
+# Vercel injects environment variables itself, so skip searching for a .env
+if not os.environ.get('VERCEL'):
+    load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -69,7 +71,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',    
 ]
 
-ROOT_URLCONF = 'harumada.urls'
+# harumada/asgi.py turns this on to serve the hot endpoints from async views
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', '').lower() in ('1', 'true')
+
+ROOT_URLCONF = 'harumada.async_urls' if ASYNC_API_VIEWS else 'harumada.urls'
 
 TEMPLATES = [
     {
@@ -91,13 +96,18 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'harumada.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '20')),
 }
 
+# Upper bound for the ?page_size= query parameter
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
 WSGI_APPLICATION = 'harumada.wsgi.application'
 
 
@@ -107,35 +117,132 @@ WSGI_APPLICATION = 'harumada.wsgi.application'
 # Check if we're running on Vercel
 IS_VERCEL = os.environ.get('VERCEL', False)
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and health-checked
+# before reuse, so most requests skip TCP, TLS and authentication. Setting
+# DB_POOL_MAX_SIZE switches to psycopg's in-process pool instead, which needs
+# `pip install "psycopg[binary,pool]"`; Django doesn't combine pooling with
+# persistent connections.
+DB_POOL_MAX_SIZE = os.getenv('DB_POOL_MAX_SIZE')
+
+POSTGRES_OPTIONS = {}
+if DB_POOL_MAX_SIZE:
+    POSTGRES_OPTIONS['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(DB_POOL_MAX_SIZE),
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+    }
+
+POSTGRES_CONNECTION = {
+    'ENGINE': 'harumada.db.postgresql',
+    'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+    'CONN_HEALTH_CHECKS': True,
+}
+
 if IS_VERCEL:
+    # Port 6543 is Supabase's transaction pooler: each transaction may land on
+    # a different server connection, so named cursors can't outlive one.
+    # psycopg 3 prepared statements are already off unless OPTIONS enables them.
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            **POSTGRES_CONNECTION,
             'NAME': os.getenv('SUPABASE_DB_NAME'),
             'USER': os.getenv('SUPABASE_DB_USER'),
             'PASSWORD': os.getenv('SUPABASE_DB_PASSWORD'),
             'HOST': os.getenv('SUPABASE_DB_HOST'),
             'PORT': os.getenv('SUPABASE_DB_PORT', '6543'),
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('SUPABASE_DB_PORT', '6543') == '6543',
             'OPTIONS': {
+                **POSTGRES_OPTIONS,
                 'sslmode': 'require'
             },
         }
     }
+elif os.getenv('POSTGRES_DB'):
+    # Local Postgres for trying the connection settings above
+    DATABASES = {
+        'default': {
+            **POSTGRES_CONNECTION,
+            'NAME': os.getenv('POSTGRES_DB'),
+            'USER': os.getenv('POSTGRES_USER', ''),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'OPTIONS': dict(POSTGRES_OPTIONS),
+        }
+    }
 else:
     DATABASES = {
         'default': {
         # Local DB
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'harumada.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
     }
 }
 
-if IS_VERCEL:
-    print(f"Database settings on Vercel:")
-    print(f"Host: {DATABASES['default']['HOST']}")
-    print(f"Port: {DATABASES['default']['PORT']}")
-    print(f"Name: {DATABASES['default']['NAME']}")
-    print(f"User: {DATABASES['default']['USER']}")
+# Optional read replica. With REDIS_URL set, reads of GET/HEAD/OPTIONS
+# requests go there, see harumada/routers.py. Locally, SQLITE_REPLICA_PATH
+# names a second SQLite file kept in step with
+# `python manage.py sync_sqlite_replica`.
+if IS_VERCEL and os.getenv('SUPABASE_REPLICA_DB_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('SUPABASE_REPLICA_DB_HOST'),
+        'PORT': os.getenv('SUPABASE_REPLICA_DB_PORT', DATABASES['default']['PORT']),
+    }
+elif not IS_VERCEL and os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+    }
+
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# Users who just wrote are pinned to the primary through the default cache.
+# A per-process LocMemCache can't carry that pin to the instance serving
+# their next read, which would then see the lagging replica. So reads are
+# only routed to the replica when REDIS_URL provides a shared backend.
+if 'replica' in DATABASES and os.getenv('REDIS_URL'):
+    DATABASE_ROUTERS = ['harumada.routers.PrimaryReplicaRouter']
+    MIDDLEWARE.append('harumada.routers.ReplicaRoutingMiddleware')
+
+# Seconds a user's reads stay on the primary after they write
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Serialized goals (goals.cache) live in their own alias. They are
+# invalidated by bumping version keys, which only reaches other processes
+# through a shared backend; with per-process LocMemCache every other
+# instance would keep serving its copy, and since ETags come from the
+# database clients would then get 304s for that stale body. So without
+# REDIS_URL the goal cache is a DummyCache and every read serializes.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        },
+        'goals': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'goals': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
+
+# Seconds a serialized goal stays cached
+GOAL_CACHE_TIMEOUT = int(os.getenv('GOAL_CACHE_TIMEOUT', '86400'))
 
 # Supabase credentials
 SUPABASE_URL = os.getenv('SUPABASE_URL')
@@ -162,6 +269,14 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # JWT settings
 from datetime import timedelta
+# Seconds an authenticated user is served from the cache instead of the users
+# table. User.save() and delete() drop the entry, but with the LocMemCache
+# fallback only in their own process: other workers would keep accepting a
+# deactivated or deleted user until the entry expires. So the cache is off
+# (0) unless REDIS_URL provides a shared backend; setting it explicitly
+# accepts up to that many seconds of such staleness.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60' if os.getenv('REDIS_URL') else '0'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -169,6 +284,38 @@ SIMPLE_JWT = {
 }
 
 
+# Logging
+# https://docs.djangoproject.com/en/5.0/topics/logging/
+
+GOAL_LOG_LEVEL = os.getenv('GOAL_LOG_LEVEL', 'WARNING')
+
+# Fraction of goal status transitions logged at INFO (0.0 - 1.0)
+GOAL_STATUS_LOG_SAMPLE_RATE = float(os.getenv('GOAL_STATUS_LOG_SAMPLE_RATE', '1.0'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'loggers': {
+        'goals': {
+            'handlers': ['console'],
+            'level': GOAL_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
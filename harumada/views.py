@@ -0,0 +1,12 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from . import db
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_stats(request):
+    """Connect latency and pool wait counters of the database connections in this process"""
+    return Response(db.get_stats())
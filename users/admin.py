@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from . import cache as user_cache
 from .models import User
 
 @admin.register(User)
@@ -19,6 +20,13 @@ class UserAdmin(UserAdmin):
 
     readonly_fields = ('created_at', 'updated_at')
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip User.delete(), which drops the cached auth user
+        user_ids = list(queryset.values_list('pk', flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            user_cache.invalidate_user(user_id)
+
     add_fieldsets = (
         (None, {
             'classes': ('wide',),
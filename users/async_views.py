@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from harumada.async_api import async_api_view, json_response
+from .serializers import UserSerializer
+from .views import UserViewSet
+
+
+@async_api_view(
+    ['GET', 'HEAD', 'DELETE'],
+    fallback=UserViewSet.as_view({'put': 'me', 'patch': 'me'})
+)
+async def me(request):
+    user = request.user
+    if request.method != 'DELETE':
+        return json_response(UserSerializer(user).data)
+
+    password = request.data.get('password')
+    if not password:
+        return json_response({'detail': 'Password is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Hashing is deliberately slow, so keep it off the event loop and out of
+    # the thread that serializes this request's database work
+    if not await sync_to_async(user.check_password, thread_sensitive=False)(password):
+        return json_response({'detail': 'Incorrect password.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    await user.adelete()
+    return json_response({'detail': 'Your account has been successfully deleted.'})
@@ -0,0 +1,29 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from . import cache as user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reuses the resolved user for AUTH_USER_CACHE_TIMEOUT seconds.
+
+    Only users that pass JWTAuthentication's checks are cached, without their
+    password hash. User.save() and delete() drop the entry, so deactivation,
+    password changes and deletion take effect on the next request, in every
+    process only if the cache backend is shared; see AUTH_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            user = user_cache.get_user(user_id)
+            if user is not None:
+                return user
+
+        user = super().get_user(validated_token)
+        user_cache.set_user(user)
+        return user
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+# Never cached; reading it from a cached user loads it from the database
+UNCACHED_FIELDS = {'password'}
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def cached_fields(user_model):
+    return [
+        field.attname for field in user_model._meta.concrete_fields
+        if field.attname not in UNCACHED_FIELDS
+    ]
+
+
+def get_user(user_id):
+    """Cached user resolved from a token, or None.
+
+    The password hash is a deferred field, so check_password() still reads the
+    users table and save() only writes the cached fields.
+    """
+    cached = cache.get(user_key(user_id))
+    if cached is None:
+        return None
+    db, values = cached
+    return get_user_model().from_db(db, list(values), list(values.values()))
+
+
+def set_user(user):
+    values = {name: getattr(user, name) for name in cached_fields(type(user))}
+    cache.set(user_key(user.pk), (user._state.db, values), settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    """Make the next request authenticated as this user reload them"""
+    cache.delete(user_key(user_id))
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
+from goals import cache as goal_cache
+from . import cache as user_cache
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username, password=None, **extra_fields):
@@ -56,6 +58,32 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='users_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'username' in field_names:
+            instance._loaded_username = instance.username
+        return instance
+
+    def save(self, *args, **kwargs):
+        username_changed = not self._state.adding and \
+            getattr(self, '_loaded_username', None) != self.username
+        super().save(*args, **kwargs)
+        self._loaded_username = self.username
+        user_cache.invalidate_user(self.pk)
+        if username_changed:
+            # Usernames are embedded in cached goal payloads, whichever path renamed the user
+            goal_cache.invalidate_all_goals()
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        user_cache.invalidate_user(user_id)
+        return result
 
     def __str__(self):
         return self.email
\ No newline at end of file
@@ -1,3 +1,76 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from . import cache as user_cache
+from .models import User
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner@example.com', 'owner', 'password')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        )
+
+    def test_user_lookup_is_cached_until_user_changes(self):
+        self.client.get('/api/users/me/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['username'], 'owner')
+
+        self.client.patch('/api/users/me/', {'username': 'renamed'}, format='json')
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['username'], 'renamed')
+
+    def test_password_hash_is_not_cached(self):
+        self.client.get('/api/users/me/')
+        cached = cache.get(user_cache.user_key(self.user.id))
+        self.assertNotIn('password', cached[1])
+        self.assertNotIn(self.user.password, repr(cached))
+
+        user = user_cache.get_user(self.user.id)
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('password'))
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get('/api/users/me/')
+        self.client.delete('/api/users/me/', {'password': 'password'}, format='json')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/users/me/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+
+@override_settings(ROOT_URLCONF='harumada.async_urls')
+class AsyncMeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner@example.com', 'owner', 'password')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self.client = AsyncClient()
+
+    async def test_me_and_delete(self):
+        response = await self.client.get('/api/users/me/', headers=self.auth)
+        self.assertEqual(response.json()['username'], 'owner')
+
+        response = await self.client.delete(
+            '/api/users/me/', {'password': 'wrong'}, content_type='application/json', headers=self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.client.delete(
+            '/api/users/me/', {'password': 'password'}, content_type='application/json', headers=self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await User.objects.filter(pk=self.user.pk).aexists())
+        self.assertEqual((await self.client.get('/api/users/me/', headers=self.auth)).status_code, 401)
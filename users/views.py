@@ -41,8 +41,9 @@ class UserViewSet(viewsets.ModelViewSet):
             # Store user for deletion
             user = request.user
 
-            # Log out first
-            logout(request)
+            # Log out first; API-only deployments have no session to clear
+            if hasattr(request, 'session'):
+                logout(request)
 
             # Delete user
             user.delete()